@@ -1,37 +1,55 @@
-import base64
+import functools
+import math
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import requests
-from io import BytesIO
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-import numpy as np
-import statsmodels
-import altair as alt
-import matplotlib.pyplot as plt
+from archive import load_archive, lookup, zone2_trend
+from assets import ASSET_URLS, prefetch, get_image, get_session, font_face_css
+from charts import GAUGES_PER_PAGE, zone2_gauge, zone2_gauge_grid
+from data_loader import SCOREBOARD_URL, OFFLINE
+from diagnostics import keep_run, recording, start_recording, stage, timings_frame, timings_json
+from pipeline import load_or_build
+from scoring import KPI_WORKOUT_TYPES, workout_levels, format_minutes, calculate_kpis
 
 # Set app layout parameters
 st.set_page_config(
     page_title= "THRONE_BC",
     layout="wide")
 
+# Record stage timings for the diagnostics panel, only while it is switched on
+timings = start_recording(st.session_state.get('show_diagnostics', False))
+
 # Create tabs
 tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Zone 2 Analysis", "Leaderboard", "Information"])
 
-# Read the font file and encode it in base64
-font_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/raw/main/JUSTICE%20LEAGUE.ttf"
-response = requests.get(font_url)
-font_base64 = base64.b64encode(response.content).decode('utf-8')
+# Start preparing the font and images in the background while the scoreboard loads
+prefetch(ASSET_URLS.keys())
+
+# Function to load the precomputed tables for the current scoreboard. They are read from
+# the latest snapshot written by pipeline.py and only computed here when none exists yet.
+def load_data(url, force_refresh=False):
+    try:
+        results, status = load_or_build(url, force_refresh=force_refresh, session=get_session())
+        if status == OFFLINE:
+            st.warning("Could not reach GitHub, showing the last downloaded scoreboard.")
+        return results
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
+        return None
+
+# Function to force a re-download of the scoreboard on the next run
+def request_refresh():
+    st.session_state['force_refresh'] = True
+
+# Load the scoreboard and its precomputed tables once and share them across all tabs
+with stage('load_data'):
+    results = load_data(SCOREBOARD_URL, force_refresh=st.session_state.pop('force_refresh', False))
+data = results['scoreboard'] if results is not None else None
 
-# Custom CSS for the title font
+# Custom CSS for the title font (the base64 @font-face rule is built once per process)
+with stage('font_face_css'):
+    font_css = font_face_css('JusticeLeague')
 st.markdown(f"""
-    <style>
-    @font-face {{
-        font-family: 'JusticeLeague';
-        src: url(data:font/ttf;base64,{font_base64}) format('truetype');
-    }}
+    <style>{font_css}
     .title-font {{
         font-family: 'JusticeLeague', serif;  /* Apply the imported font */
         color: #FCD116;
@@ -46,221 +64,167 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
-# Define workout levels and their requirements
-workout_levels = {
-    "Sauntering Hippo": {
-        "min_hours": 4,
-        "zone2_and_above": 3.2
-    },
-    "Agile Antelope": {
-        "min_hours": 5,
-        "zone2_and_above": 4
-    },
-    "Wily Hyena": {
-        "min_hours": 6,
-        "zone2_and_above": 4.8
-    },
-    "Mighty Monkey": {
-        "min_hours": 7,
-        "zone2_and_above": 5.6
-    },
-    "Brave Leopard": {
-        "min_hours": 8,
-        "zone2_and_above": 6.4
-    }
-}
-
-# Function to load data from URL
-def load_data(url):
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = pd.read_excel(BytesIO(response.content))
-        return data
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return None
+# Decorator to run a view as a fragment. A fragment can rerun without the rest of the script,
+# so while diagnostics are on each of its runs is recorded as a run of its own and its timings
+# are shown under it (fragments can't update the sidebar panel).
+def timed_fragment(view):
+    @st.fragment
+    @functools.wraps(view)
+    def fragment(*args, **kwargs):
+        with recording(st.session_state.get('show_diagnostics', False)) as fragment_timings:
+            with stage(f'{view.__name__} (fragment)'):
+                view(*args, **kwargs)
+        if fragment_timings is not None:
+            run = keep_run(st.session_state.setdefault('timing_runs', {}), fragment_timings)
+            with st.expander(f'Performance diagnostics: {view.__name__} (run {run})'):
+                st.dataframe(timings_frame({run: fragment_timings}), hide_index=True)
+    return fragment
+
+
+# Function to render the selection-dependent part of the Overview tab. It runs as a fragment,
+# so changing the participant, week or gauge page reruns only this function and reuses the
+# tables and indexes loaded by the last full run.
+@timed_fragment
+def overview(results, participants, weeks):
+    selection_columns = st.columns(2)
+    selected_participant = selection_columns[0].selectbox('Select a Participant', participants)
+    selected_week = selection_columns[1].selectbox('Select a Week', weeks, index=len(weeks)-1)  # Default to the latest week
+
+    # Look up the rows of the selected participant and week in the (participant, week) index
+    lookup_participant = None if selected_participant == 'All Bourbon Chasers' else selected_participant
+    participant_data = lookup(results['indexes']['scoreboard'], participant=lookup_participant, week=selected_week)
+
+    if participant_data.empty:
+        st.warning(f"No data available for {selected_participant} (Week {selected_week})")
+        return
+
+    with st.expander(f'Raw Data for {selected_participant} (Week {selected_week})'):
+        # Convert relevant time columns to hours:minutes format on a new frame, not the filtered slice
+        time_columns = ['Total Duration', 'Zone 1', 'Zone 2', 'Zone 3', 'Zone 4', 'Zone 5']
+        st.dataframe(participant_data.assign(**{column: format_minutes(participant_data[column], na_rep='')
+                                                for column in time_columns}))
+
+    # Look up the progress of the selected participant and week
+    participant_progress = lookup(results['indexes']['progress'], participant=lookup_participant,
+                                  week=selected_week)
+
+    # Display bar chart for progress
+    st.header(f'Progress Towards Weekly Zone 2+ Goal (Week {selected_week})')
+    fig = px.bar(participant_progress, x='Participant', y=['Total Hours', 'Zone 2 and Above Hours'],
+                title=f'Progress Towards Weekly Zone 2+ Goal (Week {selected_week})',
+                labels={'value': 'Hours', 'Participant': 'Participant'},
+                barmode='group',
+                color_discrete_map={
+                    'Total Hours': '#1EB53A',
+                    'Zone 2 and Above Hours': '#00A3DD'
+                })
+
+    # Add custom hover data for formatted time
+    fig.update_traces(
+        hovertemplate='<b>%{x}</b><br><br>' +
+                    'Total Hours: %{customdata[0]}<br>' +
+                    'Zone 2 and Above Hours: %{customdata[1]}<br>' +
+                    '<extra></extra>',
+        customdata=participant_progress[['Total Hours (formatted)', 'Zone 2 and Above Hours (formatted)']]
+    )
+
+    with stage('render_progress_chart') as timing:
+        st.plotly_chart(fig)
+        timing['Rows'] = len(participant_progress)
+
+    # Display the table with time needed to reach weekly goals
+    st.header(f'Time Left to Reach Weekly Goals (Week {selected_week})')
+    st.dataframe(participant_progress[['Participant', 'Time Needed', 'Zone 2 and Above Needed']])
+
+    # Gauge Chart for Zone 2 and Above Progress
+    st.header('Zone 2 and Above Progress')
+    if selected_participant == 'All Bourbon Chasers':
+        # Render the whole club as one gauge grid, paginated for large clubs
+        pages = max(1, math.ceil(len(participant_progress) / GAUGES_PER_PAGE))
+        page = st.selectbox('Page', range(1, pages + 1)) if pages > 1 else 1
+        page_progress = participant_progress.iloc[(page - 1) * GAUGES_PER_PAGE:page * GAUGES_PER_PAGE]
+        with stage('render_gauges') as timing:
+            st.plotly_chart(zone2_gauge_grid(page_progress, selected_week), width='stretch')
+            timing['Rows'] = len(page_progress)
+    else:
+        with stage('render_gauges') as timing:
+            for index, row in participant_progress.iterrows():
+                st.plotly_chart(zone2_gauge(row, selected_week))
+            timing['Rows'] = len(participant_progress)
+
+
+# Function to render a participant's Zone 2 and above trend across the archived seasons
+@timed_fragment
+def season_trend(season_archive, progress_df, participants):
+    trend_participant = st.selectbox('Participant', participants, key='trend_participant')
+    st.dataframe(zone2_trend(season_archive, trend_participant, current=progress_df))
+
+
+# Function to render the "Weekly Big" board for the chosen workout types and places. Boards
+# are kept with the loaded tables, so each one is computed once per scoreboard version.
+@timed_fragment
+def weekly_big(results, workout_types):
+    kpi_types = st.multiselect('Workout Types', workout_types,
+                               default=[t for t in KPI_WORKOUT_TYPES if t in workout_types])
+    kpi_top_n = st.number_input('Top N per Category', min_value=1, max_value=10, value=1)
+
+    # The default board is precomputed, other boards are computed on first request
+    board_key = (tuple(kpi_types), int(kpi_top_n))
+    kpi_boards = results.setdefault('kpi_boards', {(KPI_WORKOUT_TYPES, 1): results['kpis']})
+    if board_key not in kpi_boards:
+        with stage('calculate_kpis') as timing:
+            kpi_boards[board_key] = calculate_kpis(results['scoreboard'], workout_types=kpi_types, top_n=int(kpi_top_n))
+            timing['Rows'] = len(results['scoreboard'])
+    st.dataframe(kpi_boards[board_key])
+
+
+# Function to render the goal forecast, built only once the viewer switches it on
+@timed_fragment
+def goal_forecast(progress_df, weeks):
+    if not st.toggle('Show goal forecast', key='show_forecast'):
+        return
+    # Imported here so the forecast adds nothing to the start-up of every other view
+    from forecast import MIN_FIT_WEEKS, SEASON_WEEKS, forecast_goals
+
+    fit_weeks = [week for week in weeks if MIN_FIT_WEEKS <= week < SEASON_WEEKS]
+    if not fit_weeks:
+        st.info("Not enough weeks to forecast from yet.")
+        return
+    through_week = st.selectbox('Forecast from Week', fit_weeks, index=len(fit_weeks)-1)
+    with stage('forecast_goals') as timing:
+        forecast_df = forecast_goals(progress_df, through_week=through_week)
+        timing['Rows'] = len(progress_df)
+    st.caption(f"Weekly hours projected from each participant's trend through week {through_week}; "
+               "chances are per remaining week.")
+    st.dataframe(forecast_df.round(2), hide_index=True)
 
-# URL of the Excel file in your GitHub repository
-file_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/blob/main/Kilimanjaro_Weekly_Scoreboard.xlsx?raw=true"
 
 with tab1:
     # Add flag to the top of the title
-    flag_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/blob/main/tanzania_flag.png?raw=true"
-    st.image(flag_url, use_column_width=False, width=200)
+    st.image(get_image('flag'), use_column_width=False, width=200)
 
     # Include title in the app
     st.markdown("<div class='title-font'>Throne of Africa Strava Bourbon Chasers Competition</div>", unsafe_allow_html=True)
-    st.header("Select participant in the sidebar to see where you stand.")
-    
-    data = load_data(file_url)
+    st.header("Select a participant and week to see where you stand.")
 
     if data is not None:
-        # Function to convert minutes to hours:minutes format
-        def minutes_to_hours_minutes(minutes):
-            if isinstance(minutes, float):
-                minutes = int(minutes)
-            hours = minutes // 60
-            mins = minutes % 60
-            return f"{hours}:{mins:02d}"
-
         # Add image to the Sidebar
-        image_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/blob/main/BC_Kili_Logo.jpg?raw=true"
-        st.sidebar.image(image_url, use_column_width=True)
-
-        #  for participant and week selection
-        participants = data['Participant'].unique()
-        participants = ['All Bourbon Chasers'] + list(participants)
-        weeks = data['Week'].unique()
-        latest_week = max(weeks)  # Get the latest week
-
-        selected_participant = st.sidebar.selectbox('Select a Participant', participants)
-        selected_week = st.sidebar.selectbox('Select a Week', weeks, index=len(weeks)-1)  # Default to the latest week
-
-        # Filter data based on the selected participant and week
-        if selected_participant == 'All Bourbon Chasers':
-            participant_data = data[data['Week'] == selected_week]
-        else:
-            participant_data = data[(data['Participant'] == selected_participant) & (data['Week'] == selected_week)]
-
-        if not participant_data.empty:
-            with st.expander(f'Raw Data for {selected_participant} (Week {selected_week})'):
-                # Convert relevant time columns to hours:minutes format
-                participant_data['Total Duration'] = participant_data['Total Duration'].apply(minutes_to_hours_minutes)
-                participant_data['Zone 1'] = participant_data['Zone 1'].apply(minutes_to_hours_minutes)
-                participant_data['Zone 2'] = participant_data['Zone 2'].apply(minutes_to_hours_minutes)
-                participant_data['Zone 3'] = participant_data['Zone 3'].apply(minutes_to_hours_minutes)
-                participant_data['Zone 4'] = participant_data['Zone 4'].apply(minutes_to_hours_minutes)
-                participant_data['Zone 5'] = participant_data['Zone 5'].apply(minutes_to_hours_minutes)
-
-                st.dataframe(participant_data)
-
-            # Calculate progress towards workout level goal
-            def calculate_progress(data):
-                progress = []
-                for participant in data['Participant'].unique():
-                    for week in data['Week'].unique():
-                        participant_data = data[(data['Participant'] == participant) & (data['Week'] == week)]
-                        if not participant_data.empty:
-                            chosen_level = participant_data['Workout Level'].iloc[0]
-                            level_requirements = workout_levels[chosen_level]
-
-                            total_time = participant_data['Total Duration'].sum()
-                            zone2_and_above_time = participant_data[['Zone 2', 'Zone 3', 'Zone 4', 'Zone 5']].sum().sum()
-
-                            total_hours = total_time / 60
-                            zone2_and_above_hours = zone2_and_above_time / 60
-
-                            time_needed = max(0, (level_requirements['min_hours'] * 60) - total_time)
-                            zone2_and_above_needed = max(0, (level_requirements['zone2_and_above'] * 60) - zone2_and_above_time)
-
-                            progress.append({
-                                'Participant': participant,
-                                'Week': week,
-                                'Chosen Level': chosen_level,
-                                'Total Hours': total_hours,
-                                'Total Hours (formatted)': minutes_to_hours_minutes(total_time),
-                                'Zone 2 and Above Hours': zone2_and_above_hours,
-                                'Zone 2 and Above Hours (formatted)': minutes_to_hours_minutes(zone2_and_above_time),
-                                'Time Needed': minutes_to_hours_minutes(time_needed),
-                                'Zone 2 and Above Needed': minutes_to_hours_minutes(zone2_and_above_needed),
-                                'Meets Min Hours': total_hours >= level_requirements['min_hours'],
-                                'Meets Zone 2 and Above Hours': zone2_and_above_hours >= level_requirements['zone2_and_above']
-                            })
-                return pd.DataFrame(progress)
-
-            progress_df = calculate_progress(data)
-
-            # Filter the progress dataframe based on the selected participant and week
-            if selected_participant == 'All Bourbon Chasers':
-                participant_progress = progress_df[progress_df['Week'] == selected_week]
-            else:
-                participant_progress = progress_df[(progress_df['Participant'] == selected_participant) & (progress_df['Week'] == selected_week)]
-
-            # Display bar chart for progress
-            st.header(f'Progress Towards Weekly Zone 2+ Goal (Week {selected_week})')
-            fig = px.bar(participant_progress, x='Participant', y=['Total Hours', 'Zone 2 and Above Hours'],
-                        title=f'Progress Towards Weekly Zone 2+ Goal (Week {selected_week})',
-                        labels={'value': 'Hours', 'Participant': 'Participant'},
-                        barmode='group',
-                        color_discrete_map={
-                            'Total Hours': '#1EB53A',
-                            'Zone 2 and Above Hours': '#00A3DD'
-                        })
-
-            # Add custom hover data for formatted time
-            fig.update_traces(
-                hovertemplate='<b>%{x}</b><br><br>' +
-                            'Total Hours: %{customdata[0]}<br>' +
-                            'Zone 2 and Above Hours: %{customdata[1]}<br>' +
-                            '<extra></extra>',
-                customdata=participant_progress[['Total Hours (formatted)', 'Zone 2 and Above Hours (formatted)']]
-            )
-
-            st.plotly_chart(fig)
-
-            # Display the requirements for each workout level
-            st.sidebar.header('Workout Level Requirements')
-            for level, requirements in workout_levels.items():
-                st.sidebar.write(f"**{level}**")
-                st.sidebar.write(f"Minimum Hours: {minutes_to_hours_minutes(requirements['min_hours'] * 60)}")
-                st.sidebar.write(f"Zone 2 and Above Hours: {minutes_to_hours_minutes(requirements['zone2_and_above'] * 60)}")
-                st.sidebar.write("")
-
-            # Display the table with time needed to reach weekly goals
-            st.header(f'Time Left to Reach Weekly Goals (Week {selected_week})')
-            st.dataframe(participant_progress[['Participant', 'Time Needed', 'Zone 2 and Above Needed']])
-
-            # Function to format hours and minutes for the gauge value
-            def format_hours_minutes(value):
-                hours = int(value)
-                minutes = int((value - hours) * 60)
-                return f"{hours}:{minutes:02d}"
-
-            # Gauge Chart for Zone 2 and Above Progress
-            st.header('Zone 2 and Above Progress')
-            for index, row in participant_progress.iterrows():
-                formatted_value = format_hours_minutes(row['Zone 2 and Above Hours'])
-                fig_gauge = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=row['Zone 2 and Above Hours'],
-                    title={'text': f"{row['Participant']}'s Zone 2 and Above Progress (Week {selected_week})"},
-                    number={'font': {'size': 1}},
-                    gauge={
-                        'axis': {'range': [None, workout_levels[row['Chosen Level']]['zone2_and_above']]},
-                        'bar': {'color': "#1EB53A"},
-                        'bordercolor': "#000000",
-                        'borderwidth': 2,
-                        'steps': [
-                            {'range': [0, workout_levels[row['Chosen Level']]['zone2_and_above'] * 0.5], 'color': "#FCD116"},
-                            {'range': [workout_levels[row['Chosen Level']]['zone2_and_above'] * 0.5, workout_levels[row['Chosen Level']]['zone2_and_above']], 'color': "#00A3DD"}
-                        ],
-                    }
-                ))
-                fig_gauge.update_layout(
-                    annotations=[
-                        dict(
-                            x=0.5, y=0.4,  # Position at the center
-                            text=formatted_value,  # Display the formatted value
-                            showarrow=False,
-                            font=dict(size=100)
-                        ),
-                        dict(
-                            x=0.5, y=0.0,  # Position slightly below the center value
-                            text="Completed",  # Display "Completed" text
-                            showarrow=False,
-                            font=dict(size=60)  # Font size for the "Completed" text
-                        )
-                    ],
-                    title={
-                        'text': f"{row['Participant']}'s Zone 2 and Above Progress (Week {selected_week})",
-                        'x': 0.5,
-                        'xanchor': 'center'
-                    }
-                )
-                st.plotly_chart(fig_gauge)
-        else:
-            st.warning(f"No data available for {selected_participant} (Week {selected_week})")
+        st.sidebar.image(get_image('logo'), use_column_width=True)
+
+        # Display the requirements for each workout level
+        st.sidebar.header('Workout Level Requirements')
+        min_hours = format_minutes([requirements['min_hours'] * 60 for requirements in workout_levels.values()])
+        zone2_hours = format_minutes([requirements['zone2_and_above'] * 60 for requirements in workout_levels.values()])
+        for level, level_min_hours, level_zone2_hours in zip(workout_levels, min_hours, zone2_hours):
+            st.sidebar.write(f"**{level}**")
+            st.sidebar.write(f"Minimum Hours: {level_min_hours}")
+            st.sidebar.write(f"Zone 2 and Above Hours: {level_zone2_hours}")
+            st.sidebar.write("")
+
+        # Participant and week choices, the rest of the tab depends on the selection
+        participants = ['All Bourbon Chasers'] + list(data['Participant'].unique())
+        weeks = list(data['Week'].unique())
+        overview(results, participants, weeks)
 
     # Custom CSS for styling
     st.markdown("""
@@ -279,149 +243,50 @@ with tab1:
         </style>
     """, unsafe_allow_html=True)
 
-    # Function to calculate progress towards workout level goal
-    def calculate_progress(data):
-        progress = []
-        for participant in data['Participant'].unique():
-            for week in data['Week'].unique():
-                participant_data = data[(data['Participant'] == participant) & (data['Week'] == week)]
-                if not participant_data.empty:
-                    chosen_level = participant_data['Workout Level'].iloc[0]
-                    level_requirements = workout_levels[chosen_level]
-
-                    total_time = participant_data['Total Duration'].sum()
-                    zone2_and_above_time = participant_data[['Zone 2', 'Zone 3', 'Zone 4', 'Zone 5']].sum().sum()
-
-                    total_hours = total_time / 60
-                    zone2_and_above_hours = zone2_and_above_time / 60
-
-                    time_needed = max(0, (level_requirements['min_hours'] * 60) - total_time)
-                    zone2_and_above_needed = max(0, (level_requirements['zone2_and_above'] * 60) - zone2_and_above_time)
-
-                    progress.append({
-                        'Participant': participant,
-                        'Week': week,
-                        'Chosen Level': chosen_level,
-                        'Total Hours': total_hours,
-                        'Total Hours (formatted)': minutes_to_hours_minutes(total_time),
-                        'Zone 2 and Above Hours': zone2_and_above_hours,
-                        'Zone 2 and Above Hours (formatted)': minutes_to_hours_minutes(zone2_and_above_time),
-                        'Time Needed': minutes_to_hours_minutes(time_needed),
-                        'Zone 2 and Above Needed': minutes_to_hours_minutes(zone2_and_above_needed),
-                        'Meets Min Hours': total_hours >= level_requirements['min_hours'],
-                        'Meets Zone 2 and Above Hours': zone2_and_above_hours >= level_requirements['zone2_and_above']
-                    })
-        return pd.DataFrame(progress)
-
-    progress_df = calculate_progress(data)
-
-    # Calculate leaderboard
-def calculate_leaderboard(progress_df):
-    leaderboard = []
-    for participant in progress_df['Participant'].unique():
-        participant_data = progress_df[progress_df['Participant'] == participant]
-        
-        # Week 1 calculations
-        week1_data = participant_data[participant_data['Week'] == 1]
-        week1_met_min_hours = week1_data['Meets Min Hours'].sum()
-        week1_met_zone2_and_above = week1_data['Meets Zone 2 and Above Hours'].sum()
-        week1_met_both = week1_data[(week1_data['Meets Min Hours']) & (week1_data['Meets Zone 2 and Above Hours'])].shape[0]
-        
-        # Week 2 calculations
-        week2_data = participant_data[participant_data['Week'] == 2]
-        week2_met_min_hours = week2_data['Meets Min Hours'].sum()
-        week2_met_zone2_and_above = week2_data['Meets Zone 2 and Above Hours'].sum()
-        week2_met_both = week2_data[(week2_data['Meets Min Hours']) & (week2_data['Meets Zone 2 and Above Hours'])].shape[0]
-        
-        # Weeks 3 to 10: Check only Total Duration requirement
-        weeks_met_min_hours_wk3_10 = participant_data[(participant_data['Week'] > 2) & (participant_data['Meets Min Hours'])].shape[0]
-        
-        total_points = week1_met_min_hours + week1_met_zone2_and_above + week1_met_both + week2_met_min_hours + week2_met_zone2_and_above + week2_met_both + weeks_met_min_hours_wk3_10
-
-        leaderboard.append({
-            'Participant': participant,
-            'Week 1 - Met Min Hours': week1_met_min_hours,
-            'Week 1 - Met Zone 2 and Above': week1_met_zone2_and_above,
-            #'Week 1 - Met Both Requirements': week1_met_both,
-            'Week 2 - Met Min Hours': week2_met_min_hours,
-            'Week 2 - Met Zone 2 and Above': week2_met_zone2_and_above,
-            #'Week 2 - Met Both Requirements': week2_met_both,
-            'Weeks Met Min Hours (Week 3-10)': weeks_met_min_hours_wk3_10,
-            'Total Points': total_points
-        })
-
-    leaderboard_df = pd.DataFrame(leaderboard)
-    leaderboard_df = leaderboard_df.sort_values(by='Total Points', ascending=False)
-    return leaderboard_df
-
-leaderboard_df = calculate_leaderboard(progress_df)
+# Allow a manual re-download of the scoreboard, bypassing the cache TTL
+st.sidebar.button('Refresh data', on_click=request_refresh)
 
 with tab2:
     # Add flag to the top of the title
-    flag_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/blob/main/tanzania_flag.png?raw=true"
-    st.image(flag_url, use_column_width=False, width=200)
+    st.image(get_image('flag'), use_column_width=False, width=200)
 
     # Include title in the app
     st.markdown("<div class='title-font'>Throne of Africa Strava Bourbon Chasers Competition</div>", unsafe_allow_html=True)
     st.header("Zone 2 and Above Time Analysis")
 
-    data = load_data(file_url)
-
     if data is not None:
-        # Calculate average Zone 2 and above time per participant for each workout type
-        data['Zone 2 and Above'] = data[['Zone 2', 'Zone 3', 'Zone 4', 'Zone 5']].sum(axis=1)
+        # Display the average Zone 2 and above time per participant for each workout level
+        st.subheader('Average Zone 2 and Above Time per Participant and Workout Level')
+        st.dataframe(results['zone2_averages'])
 
-        avg_zone2_per_workout = data.groupby(['Participant', 'Workout Level'])['Zone 2 and Above'].mean().reset_index()
+        # Compare with the archived seasons, if any have been added with archive.py
+        season_archive = load_archive()
+        if season_archive['seasons']:
+            st.subheader('Zone 2 and Above Across Seasons')
+            season_trend(season_archive, results['progress'], list(data['Participant'].unique()))
 
-        # Display the average Zone 2 and above time
-        st.subheader('Average Zone 2 and Above Time per Participant and Workout Level')
-        st.dataframe(avg_zone2_per_workout)
+        # Project the rest of the season and each participant's chance of meeting their targets
+        st.subheader('Goal Forecast')
+        goal_forecast(results['progress'], sorted(data['Week'].unique()))
 
-        
     else:
         st.warning("No data available to display analysis.")
 
     st.header("Weekly Big :eggplant:")
 
-    def calculate_kpis(data):
-        kpis = []
-        weeks = data['Week'].unique()
-
-        for week in weeks:
-            week_data = data[data['Week'] == week]
-            
-            longest_run_data = week_data[week_data['Workout Type'] == 'Run'].nlargest(1, 'Total Distance')
-            longest_ride_data = week_data[week_data['Workout Type'] == 'Ride'].nlargest(1, 'Total Distance')
-            longest_duration_data = week_data.nlargest(1, 'Total Duration')
-
-            longest_run = longest_run_data['Total Distance'].max()
-            longest_ride = longest_ride_data['Total Distance'].max()
-            longest_duration = longest_duration_data['Total Duration'].max()
-
-            kpis.append({
-                'Week': week,
-                'Participant - Longest Run': longest_run_data['Participant'].values[0] if not longest_run_data.empty else 'N/A',
-                'Longest Run (miles)': f"{longest_run:.2f}" if not np.isnan(longest_run) else 'N/A',
-                'Participant - Longest Ride': longest_ride_data['Participant'].values[0] if not longest_ride_data.empty else 'N/A',
-                'Longest Ride (miles)': f"{longest_ride:.2f}" if not np.isnan(longest_ride) else 'N/A',
-                'Participant - Longest Duration': longest_duration_data['Participant'].values[0] if not longest_duration_data.empty else 'N/A',
-                'Longest Duration (min)': minutes_to_hours_minutes(longest_duration) if not np.isnan(longest_duration) else 'N/A',
-            })
-        return pd.DataFrame(kpis)
-
-    kpi_df = calculate_kpis(data)
-    st.dataframe(kpi_df)
-
+    if data is not None:
+        # Choose the workout types and how many places to show per category
+        weekly_big(results, list(data['Workout Type'].unique()))
 with tab3:
     # Add flag to the top of the title
-    flag_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/blob/main/tanzania_flag.png?raw=true"
-    st.image(flag_url, use_column_width=False, width=200)
+    st.image(get_image('flag'), use_column_width=False, width=200)
 
     # Include title in the app
     st.markdown("<div class='title-font'>Throne of Africa Strava Bourbon Chasers Competition</div>", unsafe_allow_html=True)
     st.header("Strava Competition Leaderboard :hiking_boot: :mountain:")
 
-    st.dataframe(leaderboard_df)
+    if results is not None:
+        st.dataframe(results['leaderboard'])
 
 with tab4:
     st.header("Kilimanjaro Preparation :mountain:")
@@ -434,17 +299,19 @@ with tab4:
 
     # Display selected document
     if option == "Kilimanjaro Packing List":
-        png_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/raw/main/Kilimanjaro_Packing_List.png"
-        st.image(png_url, use_column_width=True)
+        st.image(get_image('packing_list'), use_column_width=True)
     elif option == "Grand Traverse Route":
-        jpg_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/raw/main/Grand_Traverse_Route.jpg"
-        st.image(jpg_url, use_column_width=True)
+        st.image(get_image('route'), use_column_width=True)
     elif option == "Climate Zones":
-        climate_png_url = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/raw/main/Climate_zones.png"
-        st.image(climate_png_url, use_column_width=True)
-
-
-    
-
-
-
+        st.image(get_image('climate_zones'), use_column_width=True)
+
+# Opt-in performance panel: the stage timings of this rerun, with the recent reruns for export
+st.sidebar.checkbox('Show performance diagnostics', key='show_diagnostics')
+if timings is not None:
+    timing_runs = st.session_state.setdefault('timing_runs', {})
+    run = keep_run(timing_runs, timings)
+    with st.sidebar.expander('Performance diagnostics', expanded=True):
+        st.dataframe(timings_frame({run: timings}), hide_index=True)
+        st.download_button('Download timings (JSON)', timings_json(timing_runs), 'timings.json', 'application/json')
+        st.download_button('Download timings (CSV)', timings_frame(timing_runs).to_csv(index=False),
+                           'timings.csv', 'text/csv')
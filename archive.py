@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_DIR, write_table
+from schema import enforce_schema
+from scoring import calculate_progress, workout_levels
+
+# Scoreboards of past seasons and challenges, stored side by side under a season key
+ARCHIVE_DIR = CACHE_DIR / "archive"
+SEASONS_FILE = "seasons.json"
+
+# Season key of the live scoreboard from GitHub
+CURRENT_SEASON = "Kilimanjaro 2024"
+
+# Raw rows are keyed by season first; the weekly aggregates by participant first because
+# cross-season queries follow one participant through every season
+INDEX_LEVELS = ["Season", "Participant", "Week"]
+WEEKLY_INDEX_LEVELS = ["Participant", "Season", "Week"]
+
+# Columns of the weekly aggregates kept in the archive (the formatted text is rebuilt on display)
+WEEKLY_COLUMNS = ["Participant", "Week", "Chosen Level", "Total Hours", "Zone 2 and Above Hours",
+                  "Meets Min Hours", "Meets Zone 2 and Above Hours"]
+
+# Archive read by this process, with the modification time of its seasons file
+_archive = {}
+
+
+# Function to key a table's rows by (season, participant, week); a table of a single season
+# without a Season column is keyed by (participant, week) under the given season. The rows are
+# sorted by the key, keeping their data order (and index) within each key, so every leading
+# part of the key maps to one contiguous block. The positions of every (season, week) pair are
+# kept as well, in data order, for the one-week-of-everyone view. Returns {'rows': sorted frame,
+# 'season', 'levels': key columns, 'blocks': {key: slice}, 'outer': {key: positions}}.
+def index_frame(frame, season=CURRENT_SEASON, levels=INDEX_LEVELS):
+    if "Season" not in frame.columns:
+        levels = [level for level in levels if level != "Season"]
+    codes = [pd.factorize(frame[level], sort=True)[0] for level in levels]
+    order = np.lexsort(codes[::-1])
+    rows = frame.take(order)
+
+    blocks = {}
+    changed = np.zeros(len(rows), dtype=bool)
+    changed[:1] = True
+    for depth, level_codes in enumerate(codes, start=1):
+        level_codes = level_codes[order]
+        changed[1:] |= level_codes[1:] != level_codes[:-1]
+        starts = np.flatnonzero(changed)
+        stops = np.append(starts[1:], len(rows))
+        values = [rows[level].to_numpy()[starts] for level in levels[:depth]]
+        blocks.update({key: slice(start, stop) for key, start, stop in zip(zip(*values), starts, stops)})
+
+    outer_levels = [levels[0], levels[-1]] if len(levels) > 2 else levels[-1:]
+    # Grouping the unsorted frame lists each pair's rows in data order; map them to sorted positions
+    sorted_positions = np.empty_like(order)
+    sorted_positions[order] = np.arange(len(order))
+    outer = {key if isinstance(key, tuple) else (key,): sorted_positions[positions] for key, positions
+             in frame.groupby(outer_levels, sort=False, observed=True).indices.items()}
+    return {"rows": rows, "season": season, "levels": levels, "blocks": blocks,
+            "outer_levels": outer_levels, "outer": outer}
+
+
+# Function to select rows from an indexed table by season, participant and/or week (None for
+# any). A selection on a leading part of the key, or on (season, week), is a dictionary lookup;
+# anything else narrows down the leading block with a mask.
+def lookup(index, season=CURRENT_SEASON, participant=None, week=None):
+    key = {"Season": season, "Participant": participant, "Week": week}
+    rows = index["rows"]
+    if "Season" not in index["levels"] and season is not None and season != index["season"]:
+        return rows.iloc[:0]
+
+    values = [key[level] for level in index["levels"]]
+    selected = [level for level in index["levels"] if key[level] is not None]
+    if selected == index["outer_levels"]:
+        return rows.take(index["outer"].get(tuple(key[level] for level in selected), []))
+    depth = next((i for i, value in enumerate(values) if value is None), len(values))
+    if depth:
+        rows = rows.iloc[index["blocks"].get(tuple(values[:depth]), slice(0, 0))]
+    for level, value in zip(index["levels"][depth:], values[depth:]):
+        if value is not None:
+            rows = rows[rows[level] == value]
+    return rows
+
+
+# Function to reduce a scoreboard to one row per participant and week
+def weekly_aggregates(data, levels=workout_levels):
+    return calculate_progress(data, levels)[WEEKLY_COLUMNS]
+
+
+def _path(archive_dir, name):
+    return Path(archive_dir) / f"{name}.parquet"
+
+
+def _label_columns(frame):
+    # Seasons have different participants, so categoricals are rebuilt over the union
+    labels = ["Season", "Participant", "Workout Type", "Workout Level", "Chosen Level"]
+    return frame.astype({column: "category" for column in labels if column in frame.columns})
+
+
+# Function to read the archive: the list of seasons, every season's rows indexed by
+# (season, participant, week) and the weekly aggregates indexed by (participant, season, week).
+# The archive is read once per process and again only after it has been changed on disk.
+def load_archive(archive_dir=ARCHIVE_DIR):
+    seasons_path = Path(archive_dir) / SEASONS_FILE
+    try:
+        mtime = seasons_path.stat().st_mtime_ns
+    except OSError:
+        return {"seasons": [], "scoreboard": None, "weekly": None}
+    cached = _archive.get(str(archive_dir))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    seasons = json.loads(seasons_path.read_text())
+    names = [season["name"] for season in seasons]
+    # Keep the seasons in the order they were run rather than alphabetically
+    season_type = pd.CategoricalDtype(names, ordered=True)
+    scoreboard = pd.read_parquet(_path(archive_dir, "scoreboards")).astype({"Season": season_type})
+    weekly = pd.read_parquet(_path(archive_dir, "weekly")).astype({"Season": season_type})
+    archive = {
+        "seasons": seasons,
+        "scoreboard": index_frame(scoreboard),
+        "weekly": index_frame(weekly, levels=WEEKLY_INDEX_LEVELS),
+    }
+    _archive[str(archive_dir)] = (mtime, archive)
+    return archive
+
+
+# Function to add (or replace) a season's scoreboard in the archive
+def add_season(season, data, archive_dir=ARCHIVE_DIR, levels=workout_levels):
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    data = enforce_schema(data)
+    archive = load_archive(archive_dir)
+    seasons = [entry for entry in archive["seasons"] if entry["name"] != season]
+
+    def without_season(table):
+        if archive[table] is None:
+            return []
+        frame = archive[table]["rows"].reset_index(drop=True)
+        return [frame[frame["Season"] != season].astype({"Season": object})]
+
+    scoreboard = pd.concat(without_season("scoreboard") + [data.assign(Season=season)], ignore_index=True)
+    weekly = pd.concat(without_season("weekly") + [weekly_aggregates(data, levels).assign(Season=season)],
+                       ignore_index=True)
+    write_table(_label_columns(scoreboard), _path(archive_dir, "scoreboards"), index=False)
+    write_table(_label_columns(weekly), _path(archive_dir, "weekly"), index=False)
+
+    seasons.append({
+        "name": season,
+        "start": str(data["Date"].min().date()) if len(data) else None,
+        "rows": len(data),
+        "participants": int(data["Participant"].nunique()),
+        "weeks": int(data["Week"].nunique()),
+        "added_at": time.time(),
+    })
+    seasons.sort(key=lambda entry: entry["start"] or "")
+    tmp_path = archive_dir / f".{SEASONS_FILE}.tmp"
+    tmp_path.write_text(json.dumps(seasons, indent=2))
+    os.replace(tmp_path, archive_dir / SEASONS_FILE)
+    return load_archive(archive_dir)
+
+
+# Function to follow a participant's Zone 2 and above time across seasons. Reads only the
+# participant's weekly aggregates; pass `current` (weekly rows of the live season, e.g. its
+# progress table) to include a season that hasn't been archived yet.
+def zone2_trend(archive, participant, current=None, current_season=CURRENT_SEASON):
+    frames = []
+    if archive["weekly"] is not None:
+        frames.append(lookup(archive["weekly"], None, participant).astype({"Season": object}))
+    archived = [season["name"] for season in archive["seasons"]]
+    if current is not None and current_season not in archived:
+        rows = current[current["Participant"] == participant]
+        frames.append(rows[WEEKLY_COLUMNS].assign(Season=current_season))
+    columns = ["Season", "Weeks", "Avg Zone 2 and Above Hours", "Avg Total Hours", "Weeks Met Zone 2 and Above"]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    seasons = archived if current_season in archived else archived + [current_season]
+    weekly = pd.concat(frames, ignore_index=True)
+    weekly["Season"] = pd.Categorical(weekly["Season"], categories=seasons, ordered=True)
+    trend = weekly.groupby("Season", observed=True).agg(**{
+        "Weeks": ("Week", "nunique"),
+        "Avg Zone 2 and Above Hours": ("Zone 2 and Above Hours", "mean"),
+        "Avg Total Hours": ("Total Hours", "mean"),
+        "Weeks Met Zone 2 and Above": ("Meets Zone 2 and Above Hours", "sum"),
+    }).reset_index()
+    return trend[columns]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the multi-season scoreboard archive.")
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="add or replace a season from a .xlsx or .parquet scoreboard")
+    add.add_argument("season")
+    add.add_argument("source")
+    commands.add_parser("list", help="list the archived seasons")
+    trend = commands.add_parser("trend", help="show a participant's Zone 2 and above trend across seasons")
+    trend.add_argument("participant")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        source = Path(args.source)
+        data = pd.read_parquet(source) if source.suffix == ".parquet" else pd.read_excel(source)
+        add_season(args.season, data, args.archive_dir)
+        print(f"Archived {len(data)} rows as '{args.season}'")
+    elif args.command == "list":
+        seasons = load_archive(args.archive_dir)["seasons"]
+        print(pd.DataFrame(seasons, columns=["name", "start", "rows", "participants", "weeks"]).to_string(index=False))
+    else:
+        print(zone2_trend(load_archive(args.archive_dir), args.participant).to_string(index=False, float_format="%.2f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import base64
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from data_loader import CACHE_DIR
+
+# Raw URLs of the static assets in the GitHub repository
+ASSET_BASE_URL = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/raw/main/"
+ASSET_URLS = {
+    "font": ASSET_BASE_URL + "JUSTICE%20LEAGUE.ttf",
+    "flag": ASSET_BASE_URL + "tanzania_flag.png",
+    "logo": ASSET_BASE_URL + "BC_Kili_Logo.jpg",
+    "packing_list": ASSET_BASE_URL + "Kilimanjaro_Packing_List.png",
+    "route": ASSET_BASE_URL + "Grand_Traverse_Route.jpg",
+    "climate_zones": ASSET_BASE_URL + "Climate_zones.png",
+}
+
+# Local copies of the assets in the repository, preferred over downloading them
+ASSET_DIR = Path(__file__).resolve().parent
+ASSET_FILES = {
+    "font": "JUSTICE LEAGUE.ttf",
+    "flag": "tanzania_flag.png",
+    "logo": "BC_Kili_Logo.jpg",
+    "packing_list": "Kilimanjaro_Packing_List.png",
+    "route": "Grand_Traverse_Route.jpg",
+    "climate_zones": "Climate_zones.png",
+}
+
+# Resized variants served to the browser instead of the full-size originals:
+# the width they are displayed at and the format they are re-encoded in
+IMAGE_VARIANTS = {
+    "flag": {"width": 200, "format": "PNG", "colors": 32},
+    "logo": {"width": 336, "format": "JPEG"},
+    "packing_list": {"width": 1200, "format": "PNG", "colors": 64},
+    "route": {"width": 1200, "format": "JPEG"},
+}
+VARIANT_CACHE_DIR = CACHE_DIR / "assets"
+# Bump when the way variants are encoded changes so cached ones are rebuilt
+VARIANT_VERSION = 2
+JPEG_QUALITY = 85
+
+# (connect, read) timeouts in seconds and the size of the shared connection pool
+ASSET_TIMEOUT = (3.05, 20)
+POOL_SIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="asset-fetch")
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+# Function to get the process-wide pooled session used for every GitHub request
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _download(url):
+    response = get_session().get(url, timeout=ASSET_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def _local_path(name):
+    path = ASSET_DIR / ASSET_FILES[name]
+    return path if path.exists() else None
+
+
+# sha256 of a file, recomputed only when its size or modification time changes
+@lru_cache(maxsize=64)
+def _file_digest(path, size, mtime_ns):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def file_digest(path):
+    stat = os.stat(path)
+    return _file_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+# Function to get the path of the resized variant of a local image, creating it on first
+# use. Variants are named after the hash of the source file, so editing the original
+# produces a new variant instead of serving a stale one.
+def image_variant(name, cache_dir=VARIANT_CACHE_DIR):
+    source = _local_path(name)
+    spec = IMAGE_VARIANTS.get(name)
+    if source is None or spec is None:
+        return source
+
+    suffix = ".jpg" if spec["format"] == "JPEG" else ".png"
+    variant = Path(cache_dir) / f"{source.stem}-{spec['width']}w-v{VARIANT_VERSION}-{file_digest(source)[:16]}{suffix}"
+    if variant.exists():
+        return variant
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return source
+
+    with Image.open(source) as image:
+        if image.width > spec["width"]:
+            height = round(image.height * spec["width"] / image.width)
+            image = image.resize((spec["width"], height), Image.LANCZOS)
+        if spec["format"] == "JPEG":
+            image = image.convert("RGB")
+            save_options = {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+        else:
+            if spec.get("colors"):
+                # Median cut only handles RGB; images with transparency are quantized with the
+                # octree method, which keeps the alpha channel in the palette
+                if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+                    image = image.convert("RGBA").quantize(spec["colors"], method=Image.Quantize.FASTOCTREE)
+                else:
+                    image = image.convert("RGB").quantize(spec["colors"])
+            save_options = {"optimize": True}
+        variant.parent.mkdir(parents=True, exist_ok=True)
+        for stale in variant.parent.glob(f"{source.stem}-{spec['width']}w-*{suffix}"):
+            stale.unlink()
+        tmp_path = variant.with_name(f"{variant.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        image.save(tmp_path, format=spec["format"], **save_options)
+    os.replace(tmp_path, variant)
+    return variant
+
+
+# Function to pre-generate every resized variant
+def build_variants(cache_dir=VARIANT_CACHE_DIR):
+    return {name: image_variant(name, cache_dir) for name in IMAGE_VARIANTS}
+
+
+# Function to start preparing assets in the background: downloading the ones without a
+# local copy and generating the resized variants of local images. Each asset is handled
+# at most once per process; later calls reuse the pending or finished work.
+def prefetch(names):
+    with _futures_lock:
+        for name in names:
+            if name in _futures:
+                continue
+            if _local_path(name) is None:
+                _futures[name] = _executor.submit(_download, ASSET_URLS[name])
+            elif name in IMAGE_VARIANTS:
+                _futures[name] = _executor.submit(image_variant, name)
+
+
+def _result(name):
+    prefetch([name])
+    future = _futures[name]
+    try:
+        return future.result()
+    except (requests.RequestException, OSError):
+        with _futures_lock:
+            if _futures.get(name) is future:
+                del _futures[name]
+        return None
+
+
+# Function to get the bytes of an asset, waiting for its download if needed.
+# Returns None when the download failed; the failure is forgotten so a later rerun retries.
+def get_asset(name):
+    local_path = _local_path(name)
+    if local_path is not None:
+        return local_path.read_bytes()
+    return _result(name)
+
+
+# Function to get an image for st.image: the resized local variant when the repository
+# has the file, otherwise the downloaded bytes, falling back to the URL if that failed
+def get_image(name):
+    local_path = _local_path(name)
+    if local_path is None:
+        return get_asset(name) or ASSET_URLS[name]
+    if name not in IMAGE_VARIANTS:
+        return str(local_path)
+    # Variants are keyed on the source hash, so regenerate if the original has changed
+    variant = _result(name)
+    if variant is not None and file_digest(local_path)[:16] not in Path(variant).name:
+        with _futures_lock:
+            _futures.pop(name, None)
+        variant = _result(name)
+    return str(variant or local_path)
+
+
+# Function to build the @font-face rule for the title font, encoded once per process
+@lru_cache(maxsize=None)
+def _font_face_css(font_family):
+    content = get_asset("font")
+    if content is None:
+        return None
+    font_base64 = base64.b64encode(content).decode('utf-8')
+    return f"""
+    @font-face {{
+        font-family: '{font_family}';
+        src: url(data:font/ttf;base64,{font_base64}) format('truetype');
+    }}"""
+
+
+def font_face_css(font_family="JusticeLeague"):
+    css = _font_face_css(font_family)
+    if css is None:
+        # Don't memoize a failed download, try again on the next rerun
+        _font_face_css.cache_clear()
+        return ""
+    return css
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate the resized image variants served by the app.")
+    parser.add_argument("--cache-dir", default=VARIANT_CACHE_DIR, help="directory to write the variants to")
+    args = parser.parse_args(argv)
+
+    for name, variant in build_variants(args.cache_dir).items():
+        if variant is None:
+            print(f"{name}: no local copy")
+            continue
+        original = ASSET_DIR / ASSET_FILES[name]
+        print(f"{name}: {original.stat().st_size / 1024:.0f} KB -> {variant.stat().st_size / 1024:.0f} KB ({variant})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from schema import enforce_schema  # noqa: E402
+from scoring import calculate_progress, calculate_leaderboard, calculate_kpis  # noqa: E402
+from synthetic import generate_scoreboard  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Default grid of club sizes, season lengths and weekly activity counts
+PARTICIPANTS = [10, 100, 500, 2000]
+WEEKS = [10]
+ACTIVITIES_PER_WEEK = [5]
+
+# A result regresses when it is this many times slower or larger than the baseline.
+# Timings below the noise floor are never flagged.
+TIME_TOLERANCE = 1.5
+MEMORY_TOLERANCE = 1.25
+NOISE_FLOOR_SECONDS = 0.005
+
+
+# The functions under test; each takes the scoreboard and the progress computed from it
+BENCHMARKS = {
+    "calculate_progress": lambda data, progress: calculate_progress(data),
+    "calculate_leaderboard": lambda data, progress: calculate_leaderboard(progress),
+    "calculate_kpis": lambda data, progress: calculate_kpis(data),
+}
+
+
+# Function to check that the loader's compact column types don't change any score. Durations
+# get one decimal place, like minutes exported from a watch, and the progress of the cast frame
+# must match the progress of the frame as parsed. Returns the number of mismatched rows.
+def check_schema_cast(participants=500, weeks=10, seed=0):
+    data = generate_scoreboard(participants, weeks, seed=seed)
+    rng = np.random.default_rng(seed)
+    data["Total Duration"] = np.round(data["Total Duration"] + rng.uniform(-0.5, 0.5, size=len(data)), 1).clip(0)
+    expected = calculate_progress(data)
+    actual = calculate_progress(enforce_schema(data))
+    columns = [column for column in expected.columns if column not in ("Participant", "Chosen Level")]
+    mismatched = (expected[columns].to_numpy() != actual[columns].to_numpy()).any(axis=1)
+    return int(mismatched.sum())
+
+
+# Function to time a call (best of `repeat`) and measure its peak traced memory in a separate run
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def run_benchmarks(participants=PARTICIPANTS, weeks=WEEKS, activities_per_week=ACTIVITIES_PER_WEEK,
+                   repeat=3, seed=0):
+    results = []
+    for n_participants, n_weeks, n_activities in product(participants, weeks, activities_per_week):
+        # Time the functions on the column types the app loads, not the generator's
+        data = enforce_schema(generate_scoreboard(n_participants, n_weeks, n_activities, seed=seed))
+        progress = calculate_progress(data)
+        for name, benchmark in BENCHMARKS.items():
+            seconds, peak = measure(lambda: benchmark(data, progress), repeat)
+            results.append({
+                "function": name,
+                "participants": n_participants,
+                "weeks": n_weeks,
+                "activities_per_week": n_activities,
+                "rows": len(data),
+                "seconds": seconds,
+                "peak_mb": peak / 2 ** 20,
+            })
+    return results
+
+
+def _key(result):
+    return result["function"], result["participants"], result["weeks"], result["activities_per_week"]
+
+
+# Function to compare results against a baseline; returns a table and the list of regressions
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    baseline_by_key = {_key(result): result for result in baseline}
+    rows, regressions = [], []
+    for result in results:
+        reference = baseline_by_key.get(_key(result))
+        row = dict(result)
+        if reference is None:
+            row.update({"time_ratio": None, "memory_ratio": None, "status": "new"})
+            rows.append(row)
+            continue
+        time_ratio = result["seconds"] / reference["seconds"] if reference["seconds"] else float("inf")
+        memory_ratio = result["peak_mb"] / reference["peak_mb"] if reference["peak_mb"] else float("inf")
+        slower = time_ratio > time_tolerance and result["seconds"] - reference["seconds"] > NOISE_FLOOR_SECONDS
+        larger = memory_ratio > memory_tolerance
+        status = "REGRESSION" if slower or larger else "ok"
+        row.update({"time_ratio": time_ratio, "memory_ratio": memory_ratio, "status": status})
+        rows.append(row)
+        if status == "REGRESSION":
+            regressions.append(row)
+    return pd.DataFrame(rows), regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scoreboard compute functions on synthetic data.")
+    parser.add_argument("--participants", type=int, nargs="+", default=PARTICIPANTS)
+    parser.add_argument("--weeks", type=int, nargs="+", default=WEEKS)
+    parser.add_argument("--activities", type=int, nargs="+", default=ACTIVITIES_PER_WEEK,
+                        help="average activities per participant per week")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    mismatches = check_schema_cast(seed=args.seed)
+    if mismatches:
+        print(f"{mismatches} progress row(s) differ after casting to the scoreboard schema")
+        return 1
+
+    results = run_benchmarks(args.participants, args.weeks, args.activities, args.repeat, args.seed)
+    report = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else []
+    table, regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    table["ms"] = table.pop("seconds") * 1000
+    columns = ["function", "participants", "weeks", "activities_per_week", "rows", "ms", "peak_mb",
+               "time_ratio", "memory_ratio", "status"]
+    print(table[columns].to_string(index=False, float_format="%.2f"))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
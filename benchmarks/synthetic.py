@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scoring import workout_levels  # noqa: E402
+
+# Mix of activity types and the average pace (miles per minute) used for their distance
+WORKOUT_TYPES = {
+    "Walk": (0.35, 1 / 18),
+    "Workout": (0.30, 0.0),
+    "Run": (0.20, 1 / 10),
+    "Ride": (0.08, 1 / 4),
+    "Hike": (0.04, 1 / 25),
+    "Swim": (0.02, 1 / 40),
+    "Golf": (0.01, 0.0),
+}
+SEASON_START = pd.Timestamp("2024-06-09")
+
+
+# Function to generate a seeded synthetic scoreboard with the same columns as the real sheet.
+# Each participant logs on average `activities_per_week` activities in each of `weeks` weeks.
+def generate_scoreboard(participants, weeks=10, activities_per_week=5, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Participant {i:04d}" for i in range(participants)], dtype=object)
+    levels = np.array(list(workout_levels), dtype=object)
+    chosen_levels = rng.choice(levels, size=participants)
+
+    counts = rng.poisson(activities_per_week, size=(participants, weeks))
+    participant_index = np.repeat(np.repeat(np.arange(participants), weeks), counts.ravel())
+    week = np.repeat(np.tile(np.arange(1, weeks + 1), participants), counts.ravel())
+    rows = len(week)
+
+    types = np.array(list(WORKOUT_TYPES), dtype=object)
+    probabilities = np.array([share for share, _ in WORKOUT_TYPES.values()])
+    paces = np.array([pace for _, pace in WORKOUT_TYPES.values()])
+    type_index = rng.choice(len(types), size=rows, p=probabilities / probabilities.sum())
+
+    # Mostly whole minutes with the occasional fractional entry, as in the real sheet
+    duration = np.round(rng.gamma(2.0, 30.0, size=rows))
+    fractional = rng.random(rows) < 0.01
+    duration[fractional] = rng.choice([0.25, 0.5, 0.75], size=fractional.sum())
+    distance = np.round(duration * paces[type_index] * rng.uniform(0.7, 1.3, size=rows), 2)
+
+    # Split each activity's minutes across the five heart rate zones
+    shares = rng.dirichlet([3.0, 3.0, 2.0, 1.0, 0.5], size=rows)
+    zones = np.floor(shares * np.floor(duration)[:, None]).astype(np.int64)
+
+    data = pd.DataFrame({
+        "Participant": names[participant_index],
+        "Date": SEASON_START + pd.to_timedelta((week - 1) * 7 + rng.integers(0, 7, size=rows), unit="D"),
+        "Workout Type": types[type_index],
+        "Total Duration": duration,
+        "Total Distance": distance,
+        "Total Elevation": np.round(distance * rng.uniform(0, 120, size=rows)).astype(np.int64),
+        "Zone 1": zones[:, 0],
+        "Zone 2": zones[:, 1],
+        "Zone 3": zones[:, 2],
+        "Zone 4": zones[:, 3],
+        "Zone 5": zones[:, 4],
+        "Workout Level": chosen_levels[participant_index],
+        "Week": week,
+    })
+    return data.sort_values("Date", kind="stable").reset_index(drop=True)
@@ -0,0 +1,111 @@
+import math
+
+import plotly.graph_objects as go
+
+from scoring import workout_levels
+
+# Number of gauges per row and per page in the whole-club gauge grid
+GAUGE_GRID_COLUMNS = 3
+GAUGES_PER_PAGE = 24
+GAUGE_ROW_HEIGHT = 300
+
+
+# Function to format hours and minutes for the gauge value
+def format_hours_minutes(value):
+    hours = int(value)
+    minutes = int((value - hours) * 60)
+    return f"{hours}:{minutes:02d}"
+
+
+# Gauge styling shared by the single and the batched view; the axis runs up to the
+# Zone 2+ goal of the participant's chosen level
+def _gauge(chosen_level, levels):
+    goal = levels[chosen_level]['zone2_and_above']
+    return {
+        'axis': {'range': [None, goal]},
+        'bar': {'color': "#1EB53A"},
+        'bordercolor': "#000000",
+        'borderwidth': 2,
+        'steps': [
+            {'range': [0, goal * 0.5], 'color': "#FCD116"},
+            {'range': [goal * 0.5, goal], 'color': "#00A3DD"}
+        ],
+    }
+
+
+# Function to build the Zone 2 and Above gauge of a single participant
+def zone2_gauge(row, week, levels=workout_levels):
+    formatted_value = format_hours_minutes(row['Zone 2 and Above Hours'])
+    fig_gauge = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=row['Zone 2 and Above Hours'],
+        title={'text': f"{row['Participant']}'s Zone 2 and Above Progress (Week {week})"},
+        number={'font': {'size': 1}},
+        gauge=_gauge(row['Chosen Level'], levels)
+    ))
+    fig_gauge.update_layout(
+        annotations=[
+            dict(
+                x=0.5, y=0.4,  # Position at the center
+                text=formatted_value,  # Display the formatted value
+                showarrow=False,
+                font=dict(size=100)
+            ),
+            dict(
+                x=0.5, y=0.0,  # Position slightly below the center value
+                text="Completed",  # Display "Completed" text
+                showarrow=False,
+                font=dict(size=60)  # Font size for the "Completed" text
+            )
+        ],
+        title={
+            'text': f"{row['Participant']}'s Zone 2 and Above Progress (Week {week})",
+            'x': 0.5,
+            'xanchor': 'center'
+        }
+    )
+    return fig_gauge
+
+
+# Function to lay out the gauges of many participants as tiles of one figure, so the
+# whole club is serialized and sent to the browser once instead of once per participant
+def zone2_gauge_grid(progress, week, levels=workout_levels, columns=GAUGE_GRID_COLUMNS):
+    count = len(progress)
+    columns = max(1, min(columns, count))
+    rows = max(1, math.ceil(count / columns))
+    x_gap, y_gap = 0.04, 0.25 / rows
+
+    fig = go.Figure()
+    annotations = []
+    participants = progress['Participant'].tolist()
+    hours = progress['Zone 2 and Above Hours'].tolist()
+    chosen_levels = progress['Chosen Level'].tolist()
+    for i, (participant, value, chosen_level) in enumerate(zip(participants, hours, chosen_levels)):
+        row, column = divmod(i, columns)
+        x0, x1 = column / columns + x_gap / 2, (column + 1) / columns - x_gap / 2
+        y1 = 1 - row / rows - y_gap / 2
+        y0 = 1 - (row + 1) / rows + y_gap / 2
+        fig.add_trace(go.Indicator(
+            mode="gauge",
+            value=value,
+            title={'text': participant},
+            gauge=_gauge(chosen_level, levels),
+            domain={'x': [x0, x1], 'y': [y0, y1]}
+        ))
+        x_center = (x0 + x1) / 2
+        annotations.append(dict(x=x_center, y=y0 + (y1 - y0) * 0.15, text=format_hours_minutes(value),
+                                showarrow=False, font=dict(size=36), xanchor='center', yanchor='bottom'))
+        annotations.append(dict(x=x_center, y=y0, text="Completed",
+                                showarrow=False, font=dict(size=16), xanchor='center', yanchor='top'))
+
+    fig.update_layout(
+        annotations=annotations,
+        height=GAUGE_ROW_HEIGHT * rows + 80,
+        margin=dict(t=80, b=40, l=30, r=30),
+        title={
+            'text': f"Zone 2 and Above Progress (Week {week})",
+            'x': 0.5,
+            'xanchor': 'center'
+        }
+    )
+    return fig
@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from schema import SCHEMA_VERSION, enforce_schema
+
+try:
+    import pyarrow  # noqa: F401  (needed by pandas for Parquet snapshots)
+except ImportError:
+    pyarrow = None
+
+# URL of the Excel file in the GitHub repository
+SCOREBOARD_URL = "https://github.com/Steven-Carter-Data/strava_killimanjaro_tracker/blob/main/Kilimanjaro_Weekly_Scoreboard.xlsx?raw=true"
+
+# Local copy of the last good download and how long it is trusted before revalidating
+CACHE_DIR = Path(os.environ.get("SCOREBOARD_CACHE_DIR", Path(__file__).resolve().parent / ".cache"))
+SCOREBOARD_TTL = 300
+REQUEST_TIMEOUT = 10
+
+# Load statuses reported alongside the data
+FRESH = "fresh"                # downloaded new content
+NOT_MODIFIED = "not-modified"  # server confirmed the local copy is current (304)
+CACHED = "cached"              # local copy used within the TTL, no request made
+OFFLINE = "offline"            # request failed, fell back to the last good snapshot
+
+
+def _snapshot_paths(cache_dir):
+    cache_dir = Path(cache_dir)
+    return cache_dir / "scoreboard.xlsx", cache_dir / "scoreboard.json"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Sessions revalidate concurrently on their own threads, so every writer gets its own tmp file
+def _tmp_path(path):
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _write_atomic(path, content):
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# Function to make sure the local snapshot is current, downloading only when the
+# TTL has expired and the server reports a change. Returns (snapshot path, meta, status).
+def fetch_scoreboard(url=SCOREBOARD_URL, cache_dir=CACHE_DIR, ttl=SCOREBOARD_TTL,
+                     force_refresh=False, session=None, timeout=REQUEST_TIMEOUT):
+    snapshot_path, meta_path = _snapshot_paths(cache_dir)
+    meta = _read_meta(meta_path) if snapshot_path.exists() else {}
+    if meta.get("url") != url:
+        meta = {}
+
+    now = time.time()
+    if meta and not force_refresh and now - meta.get("checked_at", 0) < ttl:
+        return snapshot_path, meta, CACHED
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = (session or requests).get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta:
+            status = NOT_MODIFIED
+        else:
+            response.raise_for_status()
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            _write_atomic(snapshot_path, response.content)
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": hashlib.sha256(response.content).hexdigest(),
+                "fetched_at": now,
+            }
+            status = FRESH
+    except requests.RequestException:
+        if not meta:
+            raise
+        return snapshot_path, meta, OFFLINE
+
+    meta["checked_at"] = now
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+    return snapshot_path, meta, status
+
+
+# Function to write a table as Parquet, replacing `path` only once the file is complete
+def write_table(frame, path, index=True):
+    path = Path(path)
+    tmp_path = _tmp_path(path)
+    frame.to_parquet(tmp_path, index=index)
+    os.replace(tmp_path, path)
+
+
+# Function to convert an Excel scoreboard into a typed Parquet snapshot
+def convert_to_parquet(xlsx_path, parquet_path):
+    if pyarrow is None:
+        raise ImportError("pyarrow is required to write Parquet snapshots")
+    data = enforce_schema(pd.read_excel(xlsx_path))
+    write_table(data, parquet_path, index=False)
+    return data
+
+
+# Function to read the snapshot for a given workbook, preferring the Parquet copy and
+# only parsing the Excel file when no snapshot exists for its current content
+def read_workbook(snapshot_path, digest):
+    parquet_path = snapshot_path.with_name(f"scoreboard-{digest[:16]}-v{SCHEMA_VERSION}.parquet")
+    if pyarrow is None:
+        return enforce_schema(pd.read_excel(snapshot_path))
+    try:
+        return enforce_schema(pd.read_parquet(parquet_path))
+    except OSError:
+        pass
+    for stale_path in snapshot_path.parent.glob("scoreboard-*.parquet"):
+        if stale_path != parquet_path:
+            stale_path.unlink(missing_ok=True)
+    try:
+        return convert_to_parquet(snapshot_path, parquet_path)
+    except OSError:
+        return enforce_schema(pd.read_excel(snapshot_path))
+
+
+# Function to compare load time, file size and memory of the Excel and Parquet formats
+def compare_formats(xlsx_path, parquet_path, repeat=5):
+    def best_of(load):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            frame = load()
+            timings.append(time.perf_counter() - start)
+        return min(timings), frame
+
+    excel_time, excel_data = best_of(lambda: pd.read_excel(xlsx_path))
+    parquet_time, parquet_data = best_of(lambda: pd.read_parquet(parquet_path))
+    return pd.DataFrame({
+        "Format": ["Excel (openpyxl)", "Parquet (typed)"],
+        "File Size (KB)": [Path(xlsx_path).stat().st_size / 1024, Path(parquet_path).stat().st_size / 1024],
+        "Load Time (ms)": [excel_time * 1000, parquet_time * 1000],
+        "Memory (KB)": [excel_data.memory_usage(deep=True).sum() / 1024,
+                        parquet_data.memory_usage(deep=True).sum() / 1024],
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the weekly scoreboard into a typed Parquet snapshot.")
+    parser.add_argument("xlsx_path", help="Excel scoreboard to convert")
+    parser.add_argument("parquet_path", nargs="?", help="output path (defaults to the .xlsx path with a .parquet suffix)")
+    parser.add_argument("--compare", action="store_true", help="print a size, load time and memory comparison")
+    args = parser.parse_args(argv)
+
+    parquet_path = args.parquet_path or str(Path(args.xlsx_path).with_suffix(".parquet"))
+    convert_to_parquet(args.xlsx_path, parquet_path)
+    print(f"Wrote {parquet_path}")
+    if args.compare:
+        print(compare_formats(args.xlsx_path, parquet_path).to_string(index=False, float_format="%.1f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Timings of the current rerun, or None when diagnostics are off. A context variable keeps
+# concurrent sessions, each running its script on its own thread, from mixing their records.
+_timings = contextvars.ContextVar("timings", default=None)
+
+TIMING_COLUMNS = ["Run", "Stage", "Depth", "Seconds", "Rows"]
+
+# Number of recent reruns kept for export
+RUNS_KEPT = 50
+
+
+# Function to start (or, with enabled=False, stop) recording stage timings for this thread's
+# current run. Returns the list the records are appended to, or None.
+def start_recording(enabled=True):
+    timings = [] if enabled else None
+    _timings.set(timings)
+    return timings
+
+
+# Context manager to record the stage timings of a run that happens inside another one, such as
+# a fragment rerunning on its own. Yields the run's list of records (None when disabled) and
+# restores the enclosing run's recording afterwards.
+@contextmanager
+def recording(enabled=True):
+    timings = [] if enabled else None
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+# Function to keep a finished run's records in `runs` ({run number: records}) under the next
+# run number, dropping all but the last RUNS_KEPT runs. Returns the run number.
+def keep_run(runs, records):
+    run = max(runs, default=0) + 1
+    runs[run] = records
+    for old_run in list(runs)[:-RUNS_KEPT]:
+        del runs[old_run]
+    return run
+
+
+# Context manager to time a stage. The yielded dict takes an optional "Rows" count. Stages
+# are listed in the order they start; Depth is how many enclosing stages are still running.
+# When no recording is active nothing is measured, so instrumented code costs a function call.
+@contextmanager
+def stage(name):
+    timings = _timings.get()
+    if timings is None:
+        yield {}
+        return
+    depth = sum("Seconds" not in record for record in timings)
+    record = {"Stage": name, "Depth": depth, "Rows": None}
+    timings.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["Seconds"] = time.perf_counter() - start
+
+
+# Function to turn the recorded runs ({run number: records}) into one table
+def timings_frame(runs):
+    rows = [dict(record, Run=run) for run, records in runs.items() for record in records]
+    return pd.DataFrame(rows, columns=TIMING_COLUMNS)
+
+
+def timings_json(runs):
+    return json.dumps([{"run": run, "stages": records} for run, records in runs.items()], indent=2)
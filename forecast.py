@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from scoring import workout_levels
+
+# Length of the competition in weeks
+SEASON_WEEKS = 10
+
+# Fewest fitted weeks a trend and its spread are estimated from (a line through two points
+# has no residuals to measure the spread with)
+MIN_FIT_WEEKS = 3
+
+# Smallest week-to-week spread (hours) assumed around a trend, so a participant with
+# perfectly regular weeks still gets a probability rather than a hard 0 or 1
+MIN_SPREAD_HOURS = 0.25
+
+FORECAST_COLUMNS = ['Participant', 'Chosen Level', 'Weeks Remaining', 'Projected Total Hours',
+                    'Projected Zone 2 and Above Hours', 'Chance to Meet Min Hours',
+                    'Chance to Meet Zone 2 and Above', 'Expected Weeks Meeting Min Hours']
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+
+def _normal_cdf(z):
+    return 0.5 * (1 + _erf(z / math.sqrt(2)))
+
+
+# Function to fit a linear trend to every column of `values` (weeks x series) with one
+# least-squares solve. Returns (intercepts and slopes as a 2 x series array, residual spread).
+def fit_trends(weeks, values):
+    if len(weeks) < MIN_FIT_WEEKS:
+        raise ValueError(f"At least {MIN_FIT_WEEKS} weeks are needed to fit a trend, got {len(weeks)}")
+    design = np.column_stack([np.ones(len(weeks)), weeks])
+    coefficients, _, _, _ = np.linalg.lstsq(design, values, rcond=None)
+    residuals = values - design @ coefficients
+    spread = np.sqrt((residuals ** 2).sum(axis=0) / (len(weeks) - 2))
+    return coefficients, np.maximum(spread, MIN_SPREAD_HOURS)
+
+
+# Function to project every participant's weekly total and Zone 2 and above hours for the
+# rest of the season and the chance of meeting their level's weekly targets. All participants
+# (and both measures) are fitted together; weeks without activities count as zero hours.
+# Pass through_week to forecast from an earlier point of the season; with fewer than
+# MIN_FIT_WEEKS weeks to fit, or none left to forecast, the result is empty.
+def forecast_goals(progress_df, levels=workout_levels, through_week=None, season_weeks=SEASON_WEEKS):
+    progress = progress_df if through_week is None else progress_df[progress_df['Week'] <= through_week]
+    if progress.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    weeks = np.arange(1, int(progress['Week'].max()) + 1)
+    future_weeks = np.arange(weeks[-1] + 1, season_weeks + 1)
+    if len(weeks) < MIN_FIT_WEEKS or not len(future_weeks):
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    participants = pd.Index(progress['Participant'].unique())
+    hours = (progress.pivot_table(index='Week', columns='Participant', observed=True, aggfunc='sum',
+                                  values=['Total Hours', 'Zone 2 and Above Hours'])
+             .reindex(index=weeks)
+             .reindex(columns=pd.MultiIndex.from_product([['Total Hours', 'Zone 2 and Above Hours'], participants]))
+             .fillna(0.0))
+    coefficients, spread = fit_trends(weeks, hours.to_numpy(dtype='float64'))
+
+    # Prediction interval of a linear fit: wider the further the week is from the fitted ones
+    offset = future_weeks - weeks.mean()
+    leverage = 1 / len(weeks) + offset ** 2 / ((weeks - weeks.mean()) ** 2).sum()
+    projected = np.clip(coefficients[0] + np.outer(future_weeks, coefficients[1]), 0, None)
+    scale = np.outer(np.sqrt(1 + leverage), spread)
+
+    chosen_levels = progress.groupby('Participant', sort=False, observed=True)['Chosen Level'].last().reindex(participants)
+    targets = np.concatenate([chosen_levels.map({level: req['min_hours'] for level, req in levels.items()}),
+                              chosen_levels.map({level: req['zone2_and_above'] for level, req in levels.items()})])
+    chance = 1 - _normal_cdf((targets.astype('float64') - projected) / scale)
+
+    count = len(participants)
+    return pd.DataFrame({
+        'Participant': participants,
+        'Chosen Level': chosen_levels.to_numpy(),
+        'Weeks Remaining': len(future_weeks),
+        'Projected Total Hours': projected[:, :count].mean(axis=0),
+        'Projected Zone 2 and Above Hours': projected[:, count:].mean(axis=0),
+        'Chance to Meet Min Hours': chance[:, :count].mean(axis=0),
+        'Chance to Meet Zone 2 and Above': chance[:, count:].mean(axis=0),
+        'Expected Weeks Meeting Min Hours': chance[:, :count].sum(axis=0),
+    }, columns=FORECAST_COLUMNS)
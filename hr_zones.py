@@ -0,0 +1,316 @@
+import argparse
+import json
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from schema import SCOREBOARD_COLUMNS, enforce_schema
+
+try:
+    import fitparse
+except ImportError:
+    fitparse = None
+
+# First day of week 1 of the competition
+SEASON_START = pd.Timestamp("2024-06-09")
+
+# Gaps between samples longer than this (auto-pause, lost signal) are not counted as activity time
+MAX_SAMPLE_GAP = 30.0
+
+# Heart rates are offset by activity so that every activity's zone boundaries can be searched at once
+_HR_OFFSET = 1000.0
+
+METERS_PER_MILE = 1609.344
+FEET_PER_METER = 3.28084
+# Activity types recorded by Strava, Garmin and GPX exports, mapped onto the scoreboard's Workout
+# Type labels. Keys are lower case without spaces, dashes or underscores ('trail_running' is
+# looked up as 'trailrunning').
+WORKOUT_TYPES = {
+    **dict.fromkeys(['run', 'running', 'trailrun', 'trailrunning', 'virtualrun', 'treadmill',
+                     'treadmillrunning', 'indoorrunning'], 'Run'),
+    **dict.fromkeys(['ride', 'cycling', 'biking', 'virtualride', 'ebikeride', 'ebiking', 'mountainbikeride',
+                     'mountainbiking', 'gravelride', 'gravelcycling', 'roadbiking', 'indoorcycling'], 'Ride'),
+    **dict.fromkeys(['walk', 'walking'], 'Walk'),
+    **dict.fromkeys(['hike', 'hiking'], 'Hike'),
+    'golf': 'Golf',
+    **dict.fromkeys(['workout', 'training', 'weighttraining', 'strengthtraining', 'crossfit', 'hiit',
+                     'elliptical', 'yoga'], 'Workout'),
+}
+
+STREAM_SUFFIXES = {'.csv', '.json', '.gpx', '.fit'}
+CONFIG_FILES = {'zones.json', 'activities.csv'}
+
+
+# Activity start times are kept as naive UTC so that files from different sources can be mixed
+def _naive_utc(timestamp):
+    if timestamp is None or pd.isna(timestamp):
+        return None
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_convert(None) if timestamp.tzinfo is not None else timestamp
+
+
+# Function to read a CSV stream with a 'time' column (seconds, or timestamps) and a 'heartrate'
+# column, plus optional cumulative 'distance' (meters) and 'altitude' (meters) columns
+def read_csv_stream(path):
+    frame = pd.read_csv(path)
+    stream = {'start': None, 'type': None}
+    time_column = frame['time']
+    if pd.api.types.is_numeric_dtype(time_column):
+        stream['time'] = time_column.to_numpy(dtype='float64')
+    else:
+        timestamps = pd.to_datetime(time_column, format='ISO8601')
+        stream['start'] = _naive_utc(timestamps.iloc[0])
+        stream['time'] = ((timestamps - timestamps.iloc[0]).dt.total_seconds()).to_numpy(dtype='float64')
+    for column in ('heartrate', 'distance', 'altitude'):
+        stream[column] = frame[column].to_numpy(dtype='float64') if column in frame else None
+    return stream
+
+
+# Function to read Strava API streams, either keyed by type or as a list of {type, data}
+# objects, optionally wrapped with the activity's 'start_date' and 'type'
+def read_json_stream(path):
+    with open(path) as f:
+        payload = json.load(f)
+    streams = payload.get('streams', payload) if isinstance(payload, dict) else payload
+    if isinstance(streams, list):
+        streams = {item['type']: item for item in streams}
+    values = {key: np.asarray(value['data'] if isinstance(value, dict) else value, dtype='float64')
+              for key, value in streams.items() if key in ('time', 'heartrate', 'distance', 'altitude')}
+    start = payload.get('start_date') if isinstance(payload, dict) else None
+    return {
+        'time': values['time'],
+        'heartrate': values.get('heartrate'),
+        'distance': values.get('distance'),
+        'altitude': values.get('altitude'),
+        'start': _naive_utc(start),
+        'type': payload.get('type') if isinstance(payload, dict) else None,
+    }
+
+
+def _haversine_meters(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    return 2 * 6371000.0 * np.arcsin(np.sqrt(a))
+
+
+# Function to read a GPX track with heart rate in the Garmin/Strava track point extensions
+def read_gpx_stream(path):
+    times, heartrates, elevations, latitudes, longitudes = [], [], [], [], []
+    activity_type = None
+    for _, element in ET.iterparse(path):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag == 'type' and activity_type is None:
+            activity_type = (element.text or '').strip() or None
+        if tag != 'trkpt':
+            continue
+        values = {child.tag.rsplit('}', 1)[-1]: child.text for child in element.iter()}
+        times.append(values.get('time'))
+        heartrates.append(values.get('hr', np.nan))
+        elevations.append(values.get('ele', np.nan))
+        latitudes.append(element.get('lat'))
+        longitudes.append(element.get('lon'))
+        element.clear()
+
+    timestamps = pd.to_datetime(pd.Series(times), utc=True)
+    latitudes = np.asarray(latitudes, dtype='float64')
+    longitudes = np.asarray(longitudes, dtype='float64')
+    distance = np.concatenate([[0.0], np.cumsum(_haversine_meters(latitudes, longitudes))]) if len(times) else None
+    return {
+        'time': (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy(dtype='float64'),
+        'heartrate': np.asarray(heartrates, dtype='float64'),
+        'distance': distance,
+        'altitude': np.asarray(elevations, dtype='float64'),
+        'start': _naive_utc(timestamps.iloc[0]) if len(times) else None,
+        'type': activity_type,
+    }
+
+
+# Function to read a FIT file's record messages (needs the optional fitparse package)
+def read_fit_stream(path):
+    if fitparse is None:
+        raise ImportError("fitparse is required to read FIT files")
+    records = [record.get_values() for record in fitparse.FitFile(str(path)).get_messages('record')]
+    frame = pd.DataFrame.from_records(records)
+    timestamps = pd.to_datetime(frame['timestamp'])
+    altitude = frame.get('enhanced_altitude', frame.get('altitude'))
+    return {
+        'time': (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy(dtype='float64'),
+        'heartrate': frame['heart_rate'].to_numpy(dtype='float64') if 'heart_rate' in frame else None,
+        'distance': frame['distance'].to_numpy(dtype='float64') if 'distance' in frame else None,
+        'altitude': altitude.to_numpy(dtype='float64') if altitude is not None else None,
+        'start': _naive_utc(timestamps.iloc[0]),
+        'type': None,
+    }
+
+
+STREAM_READERS = {
+    '.csv': read_csv_stream,
+    '.json': read_json_stream,
+    '.gpx': read_gpx_stream,
+    '.fit': read_fit_stream,
+}
+
+
+def read_stream(path):
+    path = Path(path)
+    return STREAM_READERS[path.suffix.lower()](path)
+
+
+# Function to map an activity type recorded in a file onto a scoreboard Workout Type (None if unknown)
+def workout_type(source_type):
+    if source_type is None:
+        return None
+    return WORKOUT_TYPES.get(''.join(character for character in source_type.lower() if character.isalnum()))
+
+
+# Function to bin many activities' heart rate streams into zone minutes in one vectorized pass.
+# `zone_bounds` holds, per activity, the lower bounds (bpm) of Zones 2-5. Each sample counts
+# for the time until the next sample, so variable sample rates are weighted correctly; gaps
+# longer than max_gap and samples without a heart rate are left out of the zone totals.
+# Returns (total minutes per activity, zone minutes per activity x 5).
+def bin_zone_minutes(times, heartrates, zone_bounds, max_gap=MAX_SAMPLE_GAP):
+    lengths = np.array([len(t) for t in times], dtype=np.int64)
+    activity = np.repeat(np.arange(len(times)), lengths)
+    time = np.concatenate(times) if len(times) else np.empty(0)
+    heartrate = np.concatenate(heartrates) if len(heartrates) else np.empty(0)
+
+    # Forward differences within each activity; the last sample of an activity gets no time
+    dt = np.zeros_like(time)
+    if len(time) > 1:
+        dt[:-1] = np.diff(time)
+        dt[:-1][activity[1:] != activity[:-1]] = 0.0
+    dt[(dt < 0) | (dt > max_gap)] = 0.0
+
+    # Search every sample against its own activity's boundaries by offsetting both per activity
+    bounds = np.asarray(zone_bounds, dtype='float64').reshape(len(times), 4)
+    offsets = np.arange(len(times)) * _HR_OFFSET
+    flat_bounds = (bounds + offsets[:, None]).ravel()
+    has_heartrate = ~np.isnan(heartrate) & (heartrate > 0)
+    zone = np.searchsorted(flat_bounds, heartrate + activity * _HR_OFFSET, side='right') - activity * 4
+    zone = np.clip(zone, 0, 4)
+
+    total_minutes = np.bincount(activity, weights=dt, minlength=len(times)) / 60
+    zone_minutes = np.bincount(activity[has_heartrate] * 5 + zone[has_heartrate], weights=dt[has_heartrate],
+                               minlength=len(times) * 5).reshape(len(times), 5) / 60
+    return total_minutes, zone_minutes
+
+
+# Function to read the participants' zone configuration:
+# {participant: {"level": ..., "zones": [z2, z3, z4, z5]}}
+def read_zone_config(path):
+    with open(path) as f:
+        config = json.load(f)
+    for participant, settings in config.items():
+        if len(settings['zones']) != 4 or list(settings['zones']) != sorted(settings['zones']):
+            raise ValueError(f"{participant}: 'zones' must be the four increasing lower bounds of Zones 2-5")
+    return config
+
+
+# Function to list the activity files in a directory. An optional activities.csv manifest maps
+# each file to its Participant, Workout Type and Date; otherwise the participant is the name of
+# the folder the file is in and the type and date come from the file when it records them.
+def discover_activities(directory):
+    directory = Path(directory)
+    manifest_path = directory / 'activities.csv'
+    if manifest_path.exists():
+        manifest = pd.read_csv(manifest_path)
+        manifest['path'] = [directory / name for name in manifest['file']]
+        return manifest
+    paths = sorted(path for path in directory.rglob('*')
+                   if path.suffix.lower() in STREAM_SUFFIXES and path.name not in CONFIG_FILES)
+    return pd.DataFrame({'path': paths, 'Participant': [path.parent.name for path in paths]})
+
+
+# Function to turn a directory of heart rate streams into scoreboard rows
+def ingest_directory(directory, zone_config=None, season_start=SEASON_START, max_gap=MAX_SAMPLE_GAP, workers=8):
+    directory = Path(directory)
+    zone_config = read_zone_config(zone_config or directory / 'zones.json')
+    activities = discover_activities(directory)
+    unknown = sorted(set(activities['Participant']) - set(zone_config))
+    if unknown:
+        raise KeyError(f"No zone configuration for: {', '.join(map(str, unknown))}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        streams = list(executor.map(read_stream, activities['path']))
+
+    times = [stream['time'] for stream in streams]
+    heartrates = [stream['heartrate'] if stream['heartrate'] is not None else np.full(len(stream['time']), np.nan)
+                  for stream in streams]
+    bounds = np.array([zone_config[participant]['zones'] for participant in activities['Participant']], dtype='float64')
+    total_minutes, zone_minutes = bin_zone_minutes(times, heartrates, bounds.reshape(-1, 4), max_gap)
+
+    def span(values, scale):
+        if values is None or not np.isfinite(values).any():
+            return 0.0
+        return (np.nanmax(values) - np.nanmin(values)) * scale
+
+    def climb(values):
+        if values is None:
+            return 0.0
+        steps = np.diff(values[~np.isnan(values)])
+        return steps[steps > 0].sum() * FEET_PER_METER
+
+    if 'Date' in activities:
+        dates = pd.to_datetime(activities['Date'])
+    else:
+        undated = [str(path) for stream, path in zip(streams, activities['path']) if stream['start'] is None]
+        if undated:
+            raise ValueError(f"No start time recorded in {', '.join(undated)}; "
+                             f"list the file's Date in activities.csv")
+        dates = pd.to_datetime(pd.Series([stream['start'] for stream in streams]))
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    dates = dates.dt.normalize()
+    # A Workout Type listed in the manifest is used as is; otherwise the file's type is mapped
+    workout_types = pd.Series([workout_type(stream['type']) for stream in streams], dtype=object)
+    if 'Workout Type' in activities:
+        workout_types = activities['Workout Type'].reset_index(drop=True).fillna(workout_types)
+    untyped = [f"{path} ({stream['type'] or 'no type'})"
+               for stream, path, label in zip(streams, activities['path'], workout_types) if pd.isna(label)]
+    if untyped:
+        raise ValueError(f"No scoreboard workout type for {', '.join(untyped)}; "
+                         f"list the file's Workout Type in activities.csv")
+
+    data = pd.DataFrame({
+        'Participant': activities['Participant'].to_numpy(),
+        'Date': dates.to_numpy(),
+        'Workout Type': workout_types.to_numpy(),
+        'Total Duration': np.round(total_minutes, 2),
+        'Total Distance': np.round([span(stream['distance'], 1 / METERS_PER_MILE) for stream in streams], 2),
+        'Total Elevation': np.rint([climb(stream['altitude']) for stream in streams]).astype(np.int64),
+        'Zone 1': np.rint(zone_minutes[:, 0]).astype(np.int64),
+        'Zone 2': np.rint(zone_minutes[:, 1]).astype(np.int64),
+        'Zone 3': np.rint(zone_minutes[:, 2]).astype(np.int64),
+        'Zone 4': np.rint(zone_minutes[:, 3]).astype(np.int64),
+        'Zone 5': np.rint(zone_minutes[:, 4]).astype(np.int64),
+        'Workout Level': [zone_config[participant]['level'] for participant in activities['Participant']],
+        'Week': ((dates - season_start).dt.days // 7 + 1).to_numpy(),
+    }, columns=SCOREBOARD_COLUMNS)
+    return enforce_schema(data.sort_values('Date', kind='stable').reset_index(drop=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build scoreboard rows from a directory of heart rate streams.")
+    parser.add_argument("directory", help="folder of .csv/.json/.gpx/.fit activity streams")
+    parser.add_argument("--zones", help="zone configuration JSON (defaults to zones.json in the directory)")
+    parser.add_argument("--season-start", default=str(SEASON_START.date()), help="first day of week 1")
+    parser.add_argument("--max-gap", type=float, default=MAX_SAMPLE_GAP, help="longest counted gap in seconds")
+    parser.add_argument("--output", help="write the rows to a .xlsx, .parquet or .csv file")
+    args = parser.parse_args(argv)
+
+    data = ingest_directory(args.directory, args.zones, pd.Timestamp(args.season_start), args.max_gap)
+    if args.output is None:
+        print(data.to_string(index=False))
+    elif args.output.endswith('.parquet'):
+        data.to_parquet(args.output, index=False)
+    elif args.output.endswith('.xlsx'):
+        data.to_excel(args.output, index=False)
+    else:
+        data.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
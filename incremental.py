@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_DIR
+from diagnostics import stage
+from scoring import workout_levels, scoring_rules, calculate_progress, calculate_leaderboard, calculate_kpis
+
+# Persisted per-week aggregates; finished weeks are reused as long as their rows are unchanged
+STORE_PATH = CACHE_DIR / "weekly_aggregates.pkl"
+
+# Bump when the layout of the stored aggregates changes so old stores are discarded
+STORE_VERSION = 1
+
+
+# Function to hash the rows of every week. Rows are hashed in one vectorized pass and
+# each week's digest covers its rows in order, so edits, additions and re-ordering
+# (which changes the chosen level) all invalidate that week.
+def week_digests(data):
+    row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    positions = data.groupby('Week', sort=False).indices
+    return {week: hashlib.sha256(row_hashes[rows].tobytes()).hexdigest() for week, rows in positions.items()}
+
+
+# Key of the settings every stored aggregate depends on
+def settings_key(levels, rules):
+    settings = json.dumps({'version': STORE_VERSION, 'levels': levels, 'rules': rules}, sort_keys=True, default=str)
+    return hashlib.sha256(settings.encode('utf-8')).hexdigest()
+
+
+def load_store(store_path=STORE_PATH):
+    try:
+        return pd.read_pickle(store_path)
+    except (OSError, EOFError, ValueError, ImportError, AttributeError):
+        return None
+
+
+def save_store(store, store_path=STORE_PATH):
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = store_path.with_name(store_path.name + '.tmp')
+    pd.to_pickle(store, tmp_path)
+    os.replace(tmp_path, store_path)
+
+
+# Put merged per-week rows back in the order the full computation would produce
+def _in_data_order(frame, data, by_participant=True):
+    if frame.empty:
+        return frame.reset_index(drop=True)
+    week_order = pd.Index(data['Week'].unique()).get_indexer(frame['Week'])
+    if not by_participant:
+        return frame.iloc[np.argsort(week_order, kind='stable')].reset_index(drop=True)
+    participant_order = pd.Index(data['Participant'].unique()).get_indexer(frame['Participant'])
+    return frame.iloc[np.lexsort((week_order, participant_order))].reset_index(drop=True)
+
+
+# Function to compute progress, leaderboard and KPIs, recomputing only the weeks whose
+# rows changed since the last run. Returns (progress_df, leaderboard_df, kpi_df, recomputed weeks).
+def update_aggregates(data, store_path=STORE_PATH, levels=workout_levels, rules=scoring_rules):
+    store_key = settings_key(levels, rules)
+    store = load_store(store_path)
+    if not store or store.get('settings_key') != store_key:
+        store = {'settings_key': store_key, 'weeks': {}, 'leaderboard_key': None, 'leaderboard': None}
+
+    digests = week_digests(data)
+    if not digests:
+        progress_df = calculate_progress(data, levels)
+        return progress_df, calculate_leaderboard(progress_df, rules), calculate_kpis(data), []
+    cached_weeks = {week: entry for week, entry in store['weeks'].items()
+                    if digests.get(week) == entry['digest']}
+    changed = [week for week in digests if week not in cached_weeks]
+
+    if changed:
+        changed_data = data[data['Week'].isin(changed)]
+        with stage('calculate_progress') as timing:
+            progress = calculate_progress(changed_data, levels)
+            timing['Rows'] = len(changed_data)
+        with stage('calculate_kpis') as timing:
+            kpis = calculate_kpis(changed_data)
+            timing['Rows'] = len(changed_data)
+        for week in changed:
+            cached_weeks[week] = {
+                'digest': digests[week],
+                'progress': progress[progress['Week'] == week],
+                'kpis': kpis[kpis['Week'] == week],
+            }
+
+    entries = [cached_weeks[week] for week in digests]
+    progress_df = _in_data_order(pd.concat([entry['progress'] for entry in entries]), data)
+    kpi_df = _in_data_order(pd.concat([entry['kpis'] for entry in entries]), data, by_participant=False)
+
+    # The leaderboard depends on every week, so it is reused only when nothing changed
+    leaderboard_key = hashlib.sha256(json.dumps([[str(week), digest] for week, digest in digests.items()]).encode('utf-8')).hexdigest()
+    if not changed and store['leaderboard_key'] == leaderboard_key:
+        leaderboard_df = store['leaderboard']
+    else:
+        with stage('calculate_leaderboard') as timing:
+            leaderboard_df = calculate_leaderboard(progress_df, rules)
+            timing['Rows'] = len(progress_df)
+
+    if changed or len(store['weeks']) != len(cached_weeks) or store['leaderboard_key'] != leaderboard_key:
+        store['weeks'] = cached_weeks
+        store['leaderboard_key'] = leaderboard_key
+        store['leaderboard'] = leaderboard_df
+        try:
+            save_store(store, store_path)
+        except OSError:
+            pass
+
+    return progress_df, leaderboard_df, kpi_df, changed
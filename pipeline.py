@@ -0,0 +1,210 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import CACHE_DIR, SCOREBOARD_URL, fetch_scoreboard, read_workbook, write_table
+from archive import index_frame
+from diagnostics import stage
+from incremental import STORE_PATH, settings_key, update_aggregates
+from schema import SCHEMA_VERSION, compact_frame, enforce_schema, memory_report
+from scoring import ZONE2_AND_ABOVE_COLUMNS, workout_levels, scoring_rules
+
+# Precomputed result snapshots, one directory per version, plus a pointer to the latest
+SNAPSHOT_DIR = CACHE_DIR / "snapshots"
+LATEST_FILE = "LATEST"
+KEEP_SNAPSHOTS = 5
+
+# Bump when the set or layout of the precomputed tables changes
+PIPELINE_VERSION = 1
+
+# Tables produced by the pipeline, in the order they are computed
+TABLES = ("scoreboard", "progress", "leaderboard", "kpis", "zone2_averages")
+
+# Snapshots already read by this process, keyed by version; treat them as read-only
+_loaded = {}
+
+
+# Function to calculate the average Zone 2 and above time per participant and workout level
+def calculate_zone2_averages(data):
+    # int32 holds the sum of four int16 zone columns without widening the whole frame
+    zone2_and_above = data[ZONE2_AND_ABOVE_COLUMNS].astype('int32').sum(axis=1).rename('Zone 2 and Above')
+    return (zone2_and_above.groupby([data['Participant'], data['Workout Level']], observed=True)
+            .mean().reset_index())
+
+
+# Function to run load -> progress -> leaderboard -> KPIs -> Zone 2 averages on a scoreboard.
+# The derived tables are compacted so they don't hold on to wide copies of the scoreboard.
+def run_pipeline(data, store_path=STORE_PATH, levels=workout_levels, rules=scoring_rules):
+    data = enforce_schema(data)
+    with stage("update_aggregates") as timing:
+        progress_df, leaderboard_df, kpi_df, _ = update_aggregates(data, store_path, levels, rules)
+        timing["Rows"] = len(data)
+    with stage("calculate_zone2_averages") as timing:
+        zone2_averages = calculate_zone2_averages(data)
+        timing["Rows"] = len(data)
+    return {
+        "scoreboard": data,
+        "progress": compact_frame(progress_df),
+        "leaderboard": compact_frame(leaderboard_df),
+        "kpis": compact_frame(kpi_df),
+        "zone2_averages": compact_frame(zone2_averages),
+    }
+
+
+# The version of a snapshot identifies both the scoreboard content and the scoring settings
+def snapshot_version(source_sha256, levels=workout_levels, rules=scoring_rules):
+    key = f"{PIPELINE_VERSION}:{SCHEMA_VERSION}:{source_sha256}:{settings_key(levels, rules)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+# Function to write the pipeline results as a versioned snapshot and point LATEST at it
+def write_snapshot(results, version, source_sha256, snapshot_dir=SNAPSHOT_DIR, overwrite=False):
+    snapshot_dir = Path(snapshot_dir)
+    target = snapshot_dir / version
+    if overwrite:
+        shutil.rmtree(target, ignore_errors=True)
+    if not (target / "manifest.json").exists():
+        # Sessions are threads of one process, so every writer stages in a directory of its own
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{version}.", suffix=".tmp", dir=snapshot_dir))
+        files = {}
+        for table in TABLES:
+            files[table] = f"{table}.parquet"
+            write_table(results[table], staging / files[table])
+        manifest = {
+            "version": version,
+            "source_sha256": source_sha256,
+            "created_at": time.time(),
+            "tables": files,
+            "rows": {table: len(results[table]) for table in TABLES},
+            "memory_bytes": {table: int(results[table].memory_usage(deep=True).sum()) for table in TABLES},
+        }
+        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(staging, ignore_errors=True)
+
+    with tempfile.NamedTemporaryFile("w", prefix=f".{LATEST_FILE}.", suffix=".tmp", dir=snapshot_dir,
+                                     delete=False) as latest_tmp:
+        latest_tmp.write(version)
+    os.replace(latest_tmp.name, snapshot_dir / LATEST_FILE)
+    _prune_snapshots(snapshot_dir, keep=version)
+    return target
+
+
+def _prune_snapshots(snapshot_dir, keep):
+    versions = sorted((path for path in snapshot_dir.iterdir()
+                       if not path.name.startswith(".") and (path / "manifest.json").exists()),
+                      key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in versions[KEEP_SNAPSHOTS:]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def latest_version(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        return (Path(snapshot_dir) / LATEST_FILE).read_text().strip() or None
+    except OSError:
+        return None
+
+
+# Function to read a snapshot's tables; returns None if the version has not been written.
+# A snapshot whose tables don't load is removed so that the next write rebuilds it.
+def read_snapshot(version, snapshot_dir=SNAPSHOT_DIR):
+    if version in _loaded:
+        return _loaded[version]
+    directory = Path(snapshot_dir) / version
+    try:
+        manifest = json.loads((directory / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+    try:
+        results = {table: pd.read_parquet(directory / name) for table, name in manifest["tables"].items()}
+    except (OSError, ValueError, KeyError):
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
+    _loaded.clear()
+    _loaded[version] = results
+    return results
+
+
+# Function to get the precomputed tables for the current scoreboard. The snapshot is read
+# when one exists for the scoreboard's content; otherwise the pipeline runs once and
+# publishes it. The scoreboard and progress are also indexed by (participant, week) under
+# results["indexes"] for the app's selections. Returns (results, load status from the fetch).
+def load_or_build(url=SCOREBOARD_URL, snapshot_dir=SNAPSHOT_DIR, force_refresh=False, session=None,
+                  levels=workout_levels, rules=scoring_rules):
+    with stage("fetch_scoreboard"):
+        snapshot_path, meta, status = fetch_scoreboard(url, force_refresh=force_refresh, session=session)
+    version = snapshot_version(meta["sha256"], levels, rules)
+    with stage("read_snapshot"):
+        results = read_snapshot(version, snapshot_dir)
+    if results is None:
+        with stage("read_workbook") as timing:
+            data = read_workbook(snapshot_path, meta["sha256"])
+            timing["Rows"] = len(data)
+        results = run_pipeline(data, levels=levels, rules=rules)
+        try:
+            with stage("write_snapshot"):
+                write_snapshot(results, version, meta["sha256"], snapshot_dir)
+        except OSError:
+            pass
+        _loaded.clear()
+        _loaded[version] = results
+    if "indexes" not in results:
+        with stage("index_frame"):
+            results["indexes"] = {table: index_frame(results[table]) for table in ("scoreboard", "progress")}
+    return results, status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precompute the dashboard tables for the current scoreboard and publish them as a snapshot.")
+    parser.add_argument("--source", default=SCOREBOARD_URL,
+                        help="scoreboard URL or local .xlsx/.parquet file (defaults to the GitHub sheet)")
+    parser.add_argument("--output", type=Path, default=SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--force", action="store_true", help="recompute even if the snapshot is current")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running and check for a new scoreboard every SECONDS")
+    parser.add_argument("--memory", action="store_true", help="print the in-memory size of each table")
+    args = parser.parse_args(argv)
+
+    while True:
+        source = Path(args.source)
+        if source.exists():
+            source_sha256 = hashlib.sha256(source.read_bytes()).hexdigest()
+            load = lambda: (pd.read_parquet(source) if source.suffix == ".parquet"
+                            else pd.read_excel(source))
+        else:
+            snapshot_path, meta, _ = fetch_scoreboard(args.source, force_refresh=True)
+            source_sha256 = meta["sha256"]
+            load = lambda: read_workbook(snapshot_path, source_sha256)
+
+        version = snapshot_version(source_sha256)
+        if not args.force and latest_version(args.output) == version:
+            print(f"Snapshot {version} is current")
+            results = read_snapshot(version, args.output)
+        else:
+            start = time.perf_counter()
+            results = run_pipeline(load())
+            target = write_snapshot(results, version, source_sha256, args.output, overwrite=args.force)
+            print(f"Wrote snapshot {version} to {target} in {time.perf_counter() - start:.2f}s")
+        if args.memory and results is not None:
+            print(memory_report({table: results[table] for table in TABLES}).to_string(index=False, float_format="%.1f"))
+
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
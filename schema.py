@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the weekly scoreboard sheet, in order
+SCOREBOARD_COLUMNS = ['Participant', 'Date', 'Workout Type', 'Total Duration', 'Total Distance', 'Total Elevation',
+                      'Zone 1', 'Zone 2', 'Zone 3', 'Zone 4', 'Zone 5', 'Workout Level', 'Week']
+
+# Column types enforced on every loaded scoreboard: categoricals for the repeated labels and
+# the narrowest numeric types that hold the sheet's minutes, distances and weeks. Duration
+# stays float64: the sheet records fractional minutes and float32 rounding moves weekly
+# totals across the goal thresholds.
+SCOREBOARD_DTYPES = {
+    "Participant": "category",
+    "Workout Type": "category",
+    "Workout Level": "category",
+    "Total Duration": "float64",
+    "Total Distance": "float32",
+    "Total Elevation": "int32",
+    "Zone 1": "int16",
+    "Zone 2": "int16",
+    "Zone 3": "int16",
+    "Zone 4": "int16",
+    "Zone 5": "int16",
+    "Week": "int16",
+}
+
+# Bump when the column types change so Parquet copies written with the old types are rebuilt
+SCHEMA_VERSION = 2
+
+# Columns that hold minutes or distances and can't be negative
+NON_NEGATIVE_COLUMNS = ['Total Duration', 'Total Distance', 'Zone 1', 'Zone 2', 'Zone 3', 'Zone 4', 'Zone 5', 'Week']
+
+# Columns where a blank cell means nothing was recorded (no GPS, no heart rate strap) and
+# counts as 0; blanks anywhere else are an error
+ZERO_IF_BLANK_COLUMNS = ['Total Distance', 'Total Elevation', 'Zone 1', 'Zone 2', 'Zone 3', 'Zone 4', 'Zone 5']
+
+# Text columns of derived tables are stored as categoricals when at most this share of values is distinct
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+class SchemaError(ValueError):
+    pass
+
+
+# Function to check a scoreboard against the schema and cast it to the compact column types.
+# Blank distances, elevations and zone minutes are read as 0. Raises SchemaError naming the
+# offending column instead of truncating or overflowing silently.
+def enforce_schema(data):
+    missing = [column for column in SCOREBOARD_COLUMNS if column not in data.columns]
+    if missing:
+        raise SchemaError(f"Scoreboard is missing column(s): {', '.join(missing)}")
+
+    data = data.fillna({column: 0 for column in ZERO_IF_BLANK_COLUMNS})
+    nulls = data[SCOREBOARD_COLUMNS].isna().sum()
+    if nulls.any():
+        details = ', '.join(f"{column} ({count})" for column, count in nulls[nulls > 0].items())
+        raise SchemaError(f"Scoreboard has empty cells in: {details}")
+
+    for column, dtype in SCOREBOARD_DTYPES.items():
+        if dtype == "category":
+            continue
+        values = data[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            raise SchemaError(f"Column '{column}' must be numeric, found {values.dtype}")
+        if column in NON_NEGATIVE_COLUMNS and (values < 0).any():
+            raise SchemaError(f"Column '{column}' has negative values")
+        if np.dtype(dtype).kind == 'i':
+            if not pd.api.types.is_integer_dtype(values) and (values != np.trunc(values)).any():
+                raise SchemaError(f"Column '{column}' must hold whole numbers")
+            limits = np.iinfo(dtype)
+            if values.min() < limits.min or values.max() > limits.max:
+                raise SchemaError(f"Column '{column}' has values outside the {dtype} range")
+
+    dates = data['Date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        try:
+            dates = pd.to_datetime(dates)
+        except (ValueError, TypeError) as e:
+            raise SchemaError(f"Column 'Date' must hold dates: {e}") from None
+
+    return data.astype(SCOREBOARD_DTYPES).assign(Date=dates)
+
+
+# Function to shrink a derived table: repeated text becomes categorical and whole numbers
+# use the narrowest integer type. Floats and flags are left as they are.
+def compact_frame(frame):
+    if frame.empty:
+        return frame
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            columns[column] = pd.to_numeric(values, downcast='integer')
+        elif (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)) \
+                and values.nunique() <= len(values) * CATEGORY_MAX_UNIQUE_RATIO:
+            columns[column] = values.astype('category')
+    return frame.assign(**columns)
+
+
+# Function to report the in-memory size of each stage's table. `frames` maps a stage name to its
+# DataFrame; the deep size counts the strings and categories themselves, not just the pointers.
+def memory_report(frames):
+    report = pd.DataFrame({
+        'Stage': list(frames),
+        'Rows': [len(frame) for frame in frames.values()],
+        'Columns': [len(frame.columns) for frame in frames.values()],
+        'Memory (KB)': [frame.memory_usage(deep=True).sum() / 1024 for frame in frames.values()],
+    })
+    total = pd.DataFrame({'Stage': ['Total'], 'Rows': [report['Rows'].sum()], 'Columns': [report['Columns'].sum()],
+                          'Memory (KB)': [report['Memory (KB)'].sum()]})
+    return pd.concat([report, total], ignore_index=True)
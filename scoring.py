@@ -0,0 +1,243 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Define workout levels and their requirements
+workout_levels = {
+    "Sauntering Hippo": {
+        "min_hours": 4,
+        "zone2_and_above": 3.2
+    },
+    "Agile Antelope": {
+        "min_hours": 5,
+        "zone2_and_above": 4
+    },
+    "Wily Hyena": {
+        "min_hours": 6,
+        "zone2_and_above": 4.8
+    },
+    "Mighty Monkey": {
+        "min_hours": 7,
+        "zone2_and_above": 5.6
+    },
+    "Brave Leopard": {
+        "min_hours": 8,
+        "zone2_and_above": 6.4
+    }
+}
+
+# Heart rate zone columns that count towards the Zone 2+ goal
+ZONE2_AND_ABOVE_COLUMNS = ['Zone 2', 'Zone 3', 'Zone 4', 'Zone 5']
+
+
+# Largest whole-minute value formatted through the lookup table (about 69 days)
+_LABEL_TABLE_LIMIT = 100_000
+
+
+@lru_cache(maxsize=8)
+def _hours_minutes_labels(size):
+    hours, mins = np.divmod(np.arange(size), 60)
+    return np.char.add(np.char.add(hours.astype(str), ':'), np.char.zfill(mins.astype(str), 2)).astype(object)
+
+
+# Function to convert minutes to hours:minutes format for a scalar, array or whole column
+# at once. Fractional minutes are truncated and missing values become na_rep.
+def format_minutes(minutes, na_rep='N/A'):
+    if np.ndim(minutes) == 0:
+        return format_minutes([minutes], na_rep)[0]
+    values = np.asarray(minutes, dtype='float64')
+    missing = np.isnan(values)
+    whole = np.trunc(np.where(missing, 0, values)).astype(np.int64)
+
+    if not whole.size:
+        text = np.empty(0, dtype=object)
+    elif 0 <= whole.min() and whole.max() < _LABEL_TABLE_LIMIT:
+        # Gather the labels from a cached table sized to the next power of two
+        size = 1 << int(whole.max()).bit_length()
+        text = _hours_minutes_labels(size)[whole]
+    else:
+        hours, mins = np.divmod(whole, 60)
+        text = np.char.add(np.char.add(hours.astype(str), ':'), np.char.zfill(mins.astype(str), 2)).astype(object)
+    text[missing] = na_rep
+
+    if isinstance(minutes, pd.Series):
+        return pd.Series(text, index=minutes.index, name=minutes.name)
+    return text
+
+
+# Function to format distances with two decimals, missing values become na_rep
+def format_distance(distances, na_rep='N/A'):
+    values = np.asarray(distances, dtype='float64')
+    text = np.char.mod('%.2f', values).astype(object) if values.size else np.empty(0, dtype=object)
+    text[np.isnan(values)] = na_rep
+    if isinstance(distances, pd.Series):
+        return pd.Series(text, index=distances.index, name=distances.name)
+    return text
+
+
+# Function to calculate progress towards workout level goal.
+# All (participant, week) pairs are aggregated in a single groupby pass instead
+# of re-masking the whole frame for every pair.
+def calculate_progress(data, levels=workout_levels):
+    columns = ['Participant', 'Week', 'Chosen Level', 'Total Hours', 'Total Hours (formatted)',
+               'Zone 2 and Above Hours', 'Zone 2 and Above Hours (formatted)', 'Time Needed',
+               'Zone 2 and Above Needed', 'Meets Min Hours', 'Meets Zone 2 and Above Hours']
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Sum in 64-bit so narrow snapshot dtypes give the same totals as the Excel ones
+    frame = data[['Participant', 'Week', 'Workout Level']].copy()
+    frame['Total Duration'] = data['Total Duration'].astype('float64')
+    frame['Zone 2 and Above'] = data[ZONE2_AND_ABOVE_COLUMNS].astype('int64').sum(axis=1)
+
+    grouped = frame.groupby(['Participant', 'Week'], sort=False, observed=True).agg(
+        chosen_level=('Workout Level', 'first'),
+        total_time=('Total Duration', 'sum'),
+        zone2_and_above_time=('Zone 2 and Above', 'sum'),
+    ).reset_index()
+
+    # Keep the participant-major, first-appearance ordering of the original loops
+    participant_order = pd.Index(data['Participant'].unique()).get_indexer(grouped['Participant'])
+    week_order = pd.Index(data['Week'].unique()).get_indexer(grouped['Week'])
+    grouped = grouped.iloc[np.lexsort((week_order, participant_order))].reset_index(drop=True)
+
+    unknown_levels = set(grouped['chosen_level']) - set(levels)
+    if unknown_levels:
+        raise KeyError(f"Unknown workout level(s): {', '.join(sorted(map(str, unknown_levels)))}")
+    min_hours = grouped['chosen_level'].map({level: req['min_hours'] for level, req in levels.items()}).astype('float64')
+    zone2_hours = grouped['chosen_level'].map({level: req['zone2_and_above'] for level, req in levels.items()}).astype('float64')
+
+    total_time = grouped['total_time']
+    zone2_and_above_time = grouped['zone2_and_above_time']
+    total_hours = total_time / 60
+    zone2_and_above_hours = zone2_and_above_time / 60
+    time_needed = (min_hours * 60 - total_time).clip(lower=0)
+    zone2_and_above_needed = (zone2_hours * 60 - zone2_and_above_time).clip(lower=0)
+
+    return pd.DataFrame({
+        'Participant': grouped['Participant'],
+        'Week': grouped['Week'],
+        'Chosen Level': grouped['chosen_level'],
+        'Total Hours': total_hours,
+        'Total Hours (formatted)': format_minutes(total_time),
+        'Zone 2 and Above Hours': zone2_and_above_hours,
+        'Zone 2 and Above Hours (formatted)': format_minutes(zone2_and_above_time),
+        'Time Needed': format_minutes(time_needed),
+        'Zone 2 and Above Needed': format_minutes(zone2_and_above_needed),
+        'Meets Min Hours': total_hours >= min_hours,
+        'Meets Zone 2 and Above Hours': zone2_and_above_hours >= zone2_hours,
+    }, columns=columns)
+
+
+# Scoring rules for the leaderboard. Each rule awards `points` for every week in
+# the inclusive `weeks` range (an end of None is open-ended) in which the
+# participant met the criterion: 'min_hours', 'zone2_and_above' or 'both'.
+# Rules without a `column` still count towards Total Points but are not shown.
+scoring_rules = [
+    {"weeks": (1, 1), "criterion": "min_hours", "points": 1, "column": "Week 1 - Met Min Hours"},
+    {"weeks": (1, 1), "criterion": "zone2_and_above", "points": 1, "column": "Week 1 - Met Zone 2 and Above"},
+    {"weeks": (1, 1), "criterion": "both", "points": 1, "column": None},
+    {"weeks": (2, 2), "criterion": "min_hours", "points": 1, "column": "Week 2 - Met Min Hours"},
+    {"weeks": (2, 2), "criterion": "zone2_and_above", "points": 1, "column": "Week 2 - Met Zone 2 and Above"},
+    {"weeks": (2, 2), "criterion": "both", "points": 1, "column": None},
+    {"weeks": (3, None), "criterion": "min_hours", "points": 1, "column": "Weeks Met Min Hours (Week 3-10)"},
+]
+
+SCORING_CRITERIA = ('min_hours', 'zone2_and_above', 'both')
+
+
+# Function to compile the rule table into arrays so that every rule can be
+# evaluated against the whole progress frame with a single broadcast
+def compile_scoring_rules(rules=scoring_rules):
+    for rule in rules:
+        if rule['criterion'] not in SCORING_CRITERIA:
+            raise ValueError(f"Unknown scoring criterion: {rule['criterion']}")
+    first_week = np.array([rule['weeks'][0] for rule in rules], dtype=float)
+    last_week = np.array([np.inf if rule['weeks'][1] is None else rule['weeks'][1] for rule in rules], dtype=float)
+    criterion = np.array([SCORING_CRITERIA.index(rule['criterion']) for rule in rules], dtype=int)
+    points = np.array([rule.get('points', 1) for rule in rules])
+    columns = [rule.get('column') for rule in rules]
+    return {'first_week': first_week, 'last_week': last_week, 'criterion': criterion,
+            'points': points, 'columns': columns}
+
+
+# Function to calculate the leaderboard from the weekly progress
+def calculate_leaderboard(progress_df, rules=scoring_rules):
+    compiled = rules if isinstance(rules, dict) else compile_scoring_rules(rules)
+    shown = [i for i, column in enumerate(compiled['columns']) if column is not None]
+    columns = ['Participant'] + [compiled['columns'][i] for i in shown] + ['Total Points']
+    if progress_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    meets_min = progress_df['Meets Min Hours'].to_numpy(dtype=bool)
+    meets_zone2 = progress_df['Meets Zone 2 and Above Hours'].to_numpy(dtype=bool)
+    criteria = np.column_stack([meets_min, meets_zone2, meets_min & meets_zone2])
+
+    # rows x rules matrix of the weeks in which each rule was met
+    week = progress_df['Week'].to_numpy(dtype=float)[:, None]
+    in_range = (week >= compiled['first_week']) & (week <= compiled['last_week'])
+    hits = (in_range & criteria[:, compiled['criterion']]).astype(np.int64)
+
+    per_rule = pd.DataFrame(hits).groupby(progress_df['Participant'].to_numpy(), sort=False).sum()
+    leaderboard_df = pd.DataFrame({'Participant': per_rule.index})
+    for i in shown:
+        leaderboard_df[compiled['columns'][i]] = per_rule[i].to_numpy()
+    leaderboard_df['Total Points'] = per_rule.to_numpy() @ compiled['points']
+
+    leaderboard_df = leaderboard_df.sort_values(by='Total Points', ascending=False)
+    return leaderboard_df
+
+
+# Workout types shown on the "Weekly Big" board by default
+KPI_WORKOUT_TYPES = ('Run', 'Ride')
+
+
+# Function to rank the activities within each group by a value column and keep the top N.
+# Both paths keep the earliest activity first on ties, like nlargest.
+def _top_activities(data, value_column, by, top_n):
+    rows = data.dropna(subset=[value_column]).reset_index(drop=True)
+    if top_n == 1:
+        # A single grouped max-index lookup, no sort needed
+        top = rows.loc[rows.groupby(by, sort=False, observed=True)[value_column].idxmax()]
+        top = top.assign(Rank=1)
+    else:
+        ranked = rows.sort_values(value_column, ascending=False, kind='stable')
+        top = ranked.groupby(by, sort=False, observed=True).head(top_n)
+        top = top.assign(Rank=top.groupby(by, sort=False, observed=True).cumcount() + 1)
+    return top.set_index(by + ['Rank'])[['Participant', value_column]]
+
+
+# Function to find the weekly longest activity of each workout type and the longest
+# duration overall. Pass workout_types=None for every type in the data, and top_n > 1
+# to list the top N per category, one row per week and rank.
+def calculate_kpis(data, workout_types=KPI_WORKOUT_TYPES, top_n=1):
+    if workout_types is None:
+        workout_types = list(pd.unique(data['Workout Type']))
+    columns = ['Week'] + (['Rank'] if top_n > 1 else [])
+    for workout_type in workout_types:
+        columns += [f'Participant - Longest {workout_type}', f'Longest {workout_type} (miles)']
+    columns += ['Participant - Longest Duration', 'Longest Duration (min)']
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+
+    weeks = pd.Index(data['Week'].unique(), name='Week')
+    board = pd.MultiIndex.from_product([weeks, range(1, top_n + 1)], names=['Week', 'Rank'])
+    kpis = pd.DataFrame(index=board)
+
+    def add_category(label, top, value_column, unit, format_values):
+        top = top.reindex(board)
+        kpis[f'Participant - Longest {label}'] = top['Participant'].astype(object).fillna('N/A')
+        kpis[f'Longest {label} ({unit})'] = format_values(top[value_column])
+
+    longest_distance = _top_activities(data, 'Total Distance', ['Week', 'Workout Type'], top_n)
+    distance_types = longest_distance.index.get_level_values('Workout Type')
+    for workout_type in workout_types:
+        top = longest_distance[distance_types == workout_type].droplevel('Workout Type')
+        add_category(workout_type, top, 'Total Distance', 'miles', format_distance)
+
+    longest_duration = _top_activities(data, 'Total Duration', ['Week'], top_n)
+    add_category('Duration', longest_duration, 'Total Duration', 'min', format_minutes)
+
+    kpis = kpis.reset_index()
+    return kpis[columns]
@@ -0,0 +1,142 @@
+import hashlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_loader import CACHED, FRESH, NOT_MODIFIED, OFFLINE, fetch_scoreboard  # noqa: E402
+
+
+# Local stand-in for the GitHub raw URL: serves `content` with an ETag and answers a matching
+# If-None-Match with 304. Every request is counted so tests can tell when none was made.
+class ScoreboardServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ScoreboardHandler)
+        self.content = b"week 1"
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/Kilimanjaro_Weekly_Scoreboard.xlsx"
+
+
+class ScoreboardHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content = self.server.content
+        etag = f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+        with self.server.lock:
+            self.server.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ScoreboardServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_first_fetch_downloads(server, tmp_path):
+    path, meta, status = fetch_scoreboard(server.url, tmp_path)
+    assert status == FRESH
+    assert path.read_bytes() == b"week 1"
+    assert meta["sha256"] == hashlib.sha256(b"week 1").hexdigest()
+    assert server.requests == [None]
+
+
+def test_within_ttl_makes_no_request(server, tmp_path):
+    fetch_scoreboard(server.url, tmp_path, ttl=300)
+    _, _, status = fetch_scoreboard(server.url, tmp_path, ttl=300)
+    assert status == CACHED
+    assert len(server.requests) == 1
+
+
+def test_revalidates_unchanged_content(server, tmp_path):
+    _, first, _ = fetch_scoreboard(server.url, tmp_path, ttl=0)
+    path, meta, status = fetch_scoreboard(server.url, tmp_path, ttl=0)
+    assert status == NOT_MODIFIED
+    assert server.requests[-1] == first["etag"]
+    assert meta["sha256"] == first["sha256"]
+    assert path.read_bytes() == b"week 1"
+
+
+def test_revalidation_picks_up_new_content(server, tmp_path):
+    fetch_scoreboard(server.url, tmp_path, ttl=0)
+    server.content = b"week 2"
+    path, meta, status = fetch_scoreboard(server.url, tmp_path, ttl=0)
+    assert status == FRESH
+    assert path.read_bytes() == b"week 2"
+    assert meta["sha256"] == hashlib.sha256(b"week 2").hexdigest()
+
+
+def test_force_refresh_ignores_ttl(server, tmp_path):
+    fetch_scoreboard(server.url, tmp_path, ttl=300)
+    server.content = b"week 2"
+    path, _, status = fetch_scoreboard(server.url, tmp_path, ttl=300, force_refresh=True)
+    assert status == FRESH
+    assert path.read_bytes() == b"week 2"
+    assert len(server.requests) == 2
+
+
+def test_falls_back_to_last_snapshot_when_offline(server, tmp_path):
+    _, first, _ = fetch_scoreboard(server.url, tmp_path, ttl=0)
+    server.shutdown()
+    server.server_close()
+    path, meta, status = fetch_scoreboard(server.url, tmp_path, ttl=0, timeout=2)
+    assert status == OFFLINE
+    assert meta["sha256"] == first["sha256"]
+    assert path.read_bytes() == b"week 1"
+
+
+def test_offline_without_snapshot_raises(server, tmp_path):
+    server.shutdown()
+    server.server_close()
+    with pytest.raises(requests.RequestException):
+        fetch_scoreboard(server.url, tmp_path, timeout=2)
+
+
+def test_concurrent_revalidation(server, tmp_path):
+    fetch_scoreboard(server.url, tmp_path, ttl=0)
+    sessions = 8
+    barrier = threading.Barrier(sessions)
+    statuses, errors = [], []
+
+    def revalidate():
+        barrier.wait()
+        for _ in range(30):
+            try:
+                statuses.append(fetch_scoreboard(server.url, tmp_path, ttl=0)[2])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=revalidate) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert set(statuses) == {NOT_MODIFIED}
+    assert not list(tmp_path.glob("*.tmp"))